@@ -0,0 +1,249 @@
+#Performance checks.
+#
+#The benchmarks time the hot paths of the games on fixed inputs (every
+#random choice comes from a seeded random.Random), so runs are comparable:
+#
+#    evaluate5     PokerHand of five cards
+#    evaluate7     PokerHand of the best five of seven
+#    deck_cycle    Deck(), shuffle, deal two hands, return them
+#    shoe_deal     dealing from an 8 deck Shoe, reshuffling at the cut card
+#    card_sort     sorting and comparing lists of Cards
+#    dictionary    opening the hangman dictionary (dic.idx, mapped)
+#    random_word   the word pick hangman() makes
+#
+#Each one runs its workload REPEAT times and keeps the fastest, reported
+#in microseconds per operation.  Results can be saved as a JSON baseline
+#and later runs compared with it; a benchmark more than --threshold
+#(default 25%) slower than its baseline is a regression:
+#
+#    python bench.py run --save bench.json
+#    python bench.py run --compare bench.json
+#
+#Import times are measured in a fresh interpreter with python -X importtime
+#(best of a few runs, cumulative microseconds of the module itself) and
+#compared with IMPORT_BUDGET_MS.  The headless modules must also not pull
+#in tkinter:
+#
+#    python bench.py imports
+#
+#test_imports.py makes the same check part of the test run.  Both bench.py
+#commands exit with status 1 on a failure.
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import timeit
+
+SEED = 20
+REPEAT = 7
+THRESHOLD = 0.25
+
+#Milliseconds, with room for a slow machine.  evaluator.py builds its lookup
+#tables at import and accounts for most of each.
+IMPORT_BUDGET_MS = {
+    'evaluator': 150,
+    'cards': 200,
+    'engine': 250,
+    'games': 250,
+}
+IMPORT_RUNS = 5
+
+
+def import_time(module, runs=IMPORT_RUNS):
+    #(best cumulative import time in ms, names of every module it imported)
+
+    best = None
+    imported = set()
+    for i in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        for line in output.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            self_us, cumulative, name = line[len('import time:'):].split('|')
+            if not cumulative.strip().isdigit():
+                continue
+            imported.add(name.strip())
+            if name.strip() == module:
+                ms = int(cumulative) / 1000.0
+                best = ms if best is None else min(best, ms)
+    if best is None:
+        raise ValueError('import_time(): no timing for %s' % module)
+    return best, imported
+
+
+def check_imports(budgets=IMPORT_BUDGET_MS):
+    #List of (module, ms, budget, problem) for the modules over budget or
+    #importing tkinter.
+
+    failures = []
+    for module in sorted(budgets):
+        ms, imported = import_time(module)
+        if ms > budgets[module]:
+            failures.append((module, ms, budgets[module], 'over budget'))
+        if 'tkinter' in imported:
+            failures.append((module, ms, budgets[module], 'imports tkinter'))
+        print('%-10s %7.1f ms  (budget %d ms)' % (module, ms, budgets[module]))
+    return failures
+
+
+def bench_evaluate5():
+    from cards import CARDS, PokerHand
+    rng = random.Random(SEED)
+    hands = [rng.sample(CARDS, 5) for i in range(2000)]
+
+    def run():
+        for cards in hands:
+            PokerHand(cards[:])
+    return run, len(hands)
+
+
+def bench_evaluate7():
+    from cards import CARDS, PokerHand
+    rng = random.Random(SEED)
+    hands = [rng.sample(CARDS, 7) for i in range(2000)]
+    PokerHand(hands[0][:])      # builds the 7-card tables
+
+    def run():
+        for cards in hands:
+            PokerHand(cards[:])
+    return run, len(hands)
+
+
+def bench_deck_cycle():
+    from cards import Deck
+
+    def run():
+        rng = random.Random(SEED)
+        for i in range(500):
+            deck = Deck()
+            deck.shuffle(rng)
+            hands = [[deck.pop() for j in range(5)] for k in range(2)]
+            for hand in hands:
+                deck.return_cards(hand)
+    return run, 500
+
+
+def bench_shoe_deal():
+    from cards import Shoe
+
+    def run():
+        shoe = Shoe(8, rng=random.Random(SEED))
+        for i in range(20000):
+            if shoe.needs_shuffle:
+                shoe.reshuffle()
+            shoe.deal()
+    return run, 20000
+
+
+def bench_card_sort():
+    from cards import CARDS
+    rng = random.Random(SEED)
+    lists = [rng.sample(CARDS, 7) for i in range(2000)]
+
+    def run():
+        for cards in lists:
+            sorted(cards, reverse=True)
+            cards[0] < cards[1]
+            cards[2] == cards[3]
+    return run, len(lists)
+
+
+def bench_dictionary():
+    import wordlist
+    wordlist.WordList()     # compiles dic.idx if it is stale
+
+    def run():
+        for i in range(100):
+            wordlist.WordList()
+    return run, 100
+
+
+def bench_random_word():
+    import wordlist
+    words = wordlist.WordList()
+
+    def run():
+        rng = random.Random(SEED)
+        for i in range(5000):
+            words.random_word(5, 10, rng=rng)
+    return run, 5000
+
+
+BENCHMARKS = {
+    'evaluate5': bench_evaluate5,
+    'evaluate7': bench_evaluate7,
+    'deck_cycle': bench_deck_cycle,
+    'shoe_deal': bench_shoe_deal,
+    'card_sort': bench_card_sort,
+    'dictionary': bench_dictionary,
+    'random_word': bench_random_word,
+}
+
+
+def run_benchmarks(names=None, repeat=REPEAT):
+    #{name: microseconds per operation}, best of repeat runs.
+
+    results = {}
+    for name in names or sorted(BENCHMARKS):
+        run, ops = BENCHMARKS[name]()
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        results[name] = best / ops * 1e6
+        print('%-12s %10.2f us/op' % (name, results[name]))
+    return results
+
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    #List of (name, us, baseline us) for the results more than threshold
+    #slower than their baseline.  Benchmarks missing from either side are
+    #skipped.
+
+    slow = []
+    for name in sorted(results):
+        if name in baseline and results[name] > baseline[name] * (1 + threshold):
+            slow.append((name, results[name], baseline[name]))
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Performance checks.')
+    parser.add_argument('check', choices=['run', 'imports'])
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks to run (default: all): %s'
+                        % ', '.join(sorted(BENCHMARKS)))
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON baseline to check against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='allowed slowdown, as a fraction')
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark %r' % name)
+
+    if args.check == 'imports':
+        failures = check_imports()
+        for module, ms, budget, problem in failures:
+            print('FAIL %s: %s (%.1f ms, budget %d ms)'
+                  % (module, problem, ms, budget))
+        sys.exit(1 if failures else 0)
+
+    results = run_benchmarks(args.names, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    failures = []
+    if args.compare:
+        with open(args.compare) as f:
+            failures = regressions(results, json.load(f), args.threshold)
+    for name, us, base in failures:
+        print('FAIL %s: %.2f us/op, baseline %.2f us/op (+%.0f%%)'
+              % (name, us, base, (us / base - 1) * 100))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+#Cards, decks and poker hand ranking.  Kept apart from games.py so they
+#can be used without starting the GUI.
+
+import random
+import logging
+
+import evaluator
+
+suits = ['S', 'H', 'D', 'C']
+ranks = ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2']
+
+POS_TOP = 0
+POS_BOTTOM = 1
+
+logger = logging.getLogger(__name__)
+
+
+def f_list(lst, sep=','):
+    return sep.join([str(x) for x in lst])
+
+
+class Card(object):
+    #A playing card.  There are exactly 52 Card objects: Card('A', 'S')
+    #always returns the same interned instance, so cards can be compared
+    #and hashed by their integer code (see evaluator.py) and rank
+    #comparisons only look at the precomputed rank value.
+
+    __slots__ = ('rank', 'suit', 'code', 'value')
+
+    def __new__(cls, rank, suit=None):
+        if suit is None:
+            suit = rank[-1]
+            rank = rank[:-1]
+        if rank not in _rank_index:
+            raise ValueError('Card(): Invalid rank')
+        if suit not in _suit_index:
+            raise ValueError('Card(): Invalid suit')
+        return CARDS[_suit_index[suit] * 13 + _rank_index[rank]]
+
+    @classmethod
+    def _make(cls, code):
+        card = object.__new__(cls)
+        card.suit = suits[code // 13]
+        card.rank = ranks[code % 13]
+        card.code = code
+        card.value = 12 - code % 13
+        return card
+
+    @classmethod
+    def from_code(cls, code):
+        return CARDS[code]
+
+    @classmethod
+    def card_list(cls, *args):
+        lst = []
+        for c in args:
+            lst.append(cls(c))
+            return lst
+
+    def __reduce__(self):
+        return (Card.from_code, (self.code,))
+
+    def __str__(self):
+        return self.rank + self.suit
+
+    def __repr__(self):
+        return '%s%s' % (self.rank, self.suit)
+
+    def __hash__(self):
+        return self.code
+
+    def __eq__(self, obj):
+        return self.code == obj.code
+
+    def __ne__(self, obj):
+        return self.code != obj.code
+
+    def __lt__(self, obj):
+        return self.value < obj.value
+
+    def __gt__(self, obj):
+        return self.value > obj.value
+
+    def __le__(self, obj):
+        return self.value <= obj.value
+
+    def __ge__(self, obj):
+        return self.value >= obj.value
+
+
+_suit_index = dict((s, i) for i, s in enumerate(suits))
+_rank_index = dict((r, i) for i, r in enumerate(ranks))
+
+#All 52 cards, indexed by code (so in the order Deck() builds them).
+CARDS = tuple(Card._make(code) for code in range(52))
+
+
+#Where a card is, for Deck.
+_ACTIVE = 0
+_POPPED = 1
+_DISCARDED = 2
+
+
+class Deck(object):
+    #The 52 cards live in a fixed ring of slots.  The cards still in the
+    #deck fill _count slots starting at _bottom (the top card is the last of
+    #them) and the dealt cards fill the rest, with _pos mapping a card code
+    #to its slot.  Dealing, discarding and returning a card to either end
+    #are O(1) swaps, and reset_and_shuffle() puts every card back and
+    #shuffles in place without allocating.
+
+    def __init__(self):
+        self._slots = list(CARDS)
+        self._pos = list(range(52))
+        self._state = [_ACTIVE] * 52
+        self._bottom = 0
+        self._count = 52
+        self._popped = 0
+        self._discarded = 0
+
+    @property
+    def active(self):
+        return [self._slots[(self._bottom + i) % 52]
+                for i in range(self._count)]
+
+    @property
+    def popped(self):
+        return self._dealt(_POPPED)
+
+    @property
+    def discarded(self):
+        return self._dealt(_DISCARDED)
+
+    def _dealt(self, state):
+        return [self._slots[(self._bottom + i) % 52]
+                for i in range(self._count, 52)
+                if self._state[self._slots[(self._bottom + i) % 52].code] == state]
+
+    def _swap(self, i, j):
+        slots = self._slots
+        a = slots[i]
+        b = slots[j]
+        slots[i] = b
+        slots[j] = a
+        self._pos[b.code] = i
+        self._pos[a.code] = j
+
+    def shuffle(self, rng=random):
+        #Shuffle the cards left in the deck, optionally with a given
+        #random.Random.
+
+        slots = self._slots
+        pos = self._pos
+        uniform = rng.random
+        if self._bottom + self._count > 52:
+            # wrapped around the ring: straighten it out first
+            self._slots = slots = slots[self._bottom:] + slots[:self._bottom]
+            for i, card in enumerate(slots):
+                pos[card.code] = i
+            self._bottom = 0
+        bottom = self._bottom
+        for i in range(self._count - 1, 0, -1):
+            j = bottom + int(uniform() * (i + 1))
+            slots[bottom + i], slots[j] = slots[j], slots[bottom + i]
+        for i in range(bottom, bottom + self._count):
+            pos[slots[i].code] = i
+
+    def reset_and_shuffle(self, rng=random):
+        #Put every card back in the deck and shuffle it.
+
+        state = self._state
+        for i in range(52):
+            state[i] = _ACTIVE
+        self._bottom = 0
+        self._count = 52
+        self._popped = 0
+        self._discarded = 0
+        self.shuffle(rng)
+
+    def _take(self, state):
+        if not self._count:
+            raise IndexError('Deck: no cards left')
+        self._count -= 1
+        card = self._slots[(self._bottom + self._count) % 52]
+        self._state[card.code] = state
+        return card
+
+    def pop(self):
+        #Deal the top card from the deck.
+
+        card = self._take(_POPPED)
+        self._popped += 1
+        return card
+
+    def discard(self):
+        self._take(_DISCARDED)
+        self._discarded += 1
+
+    def remove(self, cards):
+        #Take the given cards out of the deck as if they had been dealt.
+
+        for card in cards:
+            if self._state[card.code] != _ACTIVE:
+                raise Exception('Deck.remove(): card not in the deck')
+            self._swap(self._pos[card.code],
+                       (self._bottom + self._count - 1) % 52)
+            self.pop()
+
+    def return_cards(self, cards, pos=POS_BOTTOM):
+        if pos not in (POS_BOTTOM, POS_TOP):
+            raise Exception('Deck.return_cards(): invalid pos parameter')
+
+        for card in cards:
+            state = self._state[card.code]
+            if state == _DISCARDED:
+                self._discarded -= 1
+            elif state == _POPPED:
+                self._popped -= 1
+            else:
+                raise Exception('Deck.return_cards(): card not among removed cards')
+            self._state[card.code] = _ACTIVE
+            if pos == POS_BOTTOM:
+                self._bottom = (self._bottom - 1) % 52
+                self._swap(self._pos[card.code], self._bottom)
+            else:
+                self._swap(self._pos[card.code],
+                           (self._bottom + self._count) % 52)
+            self._count += 1
+
+    def return_discarded(self, pos=POS_BOTTOM):
+        self.return_cards(self.discarded, pos)
+
+    def return_popped(self, pos=POS_BOTTOM):
+        self.return_cards(self.popped, pos)
+
+    def return_all(self, pos=POS_BOTTOM):
+        self.return_popped(pos)
+        self.return_discarded(pos)
+
+    def stats(self):
+        return (self._count, self._popped, self._discarded)
+
+    def __len__(self):
+        return self._count
+
+    def __str__(self):
+        return '[%s]' % ' '.join((str(card) for card in self.active))
+
+    def __repr__(self):
+        return 'Card(%s)' % self.__str__()
+
+
+class Shoe(object):
+    #decks 52-card decks shuffled together, with a cut card at penetration
+    #(the fraction of the shoe dealt before it comes out).  The shoe is a
+    #bytearray of card codes and is shuffled lazily: each deal swaps a
+    #random one of the undealt codes to the front of the undealt part
+    #(one step of a Fisher-Yates shuffle) and moves the front past it, so
+    #dealing and burning are O(1), and reshuffle() only moves the front
+    #back, which leaves a permutation for the next deals to draw from.
+    #Nothing depends on the number of decks but the size of the array.
+    #
+    #The cards dealt are the shared Card objects, so two aces of spades
+    #from different decks are the same object and compare equal.
+
+    def __init__(self, decks=6, penetration=0.75, rng=random):
+        if decks < 1:
+            raise ValueError('Shoe(): need at least one deck')
+        if not 0 < penetration <= 1:
+            raise ValueError('Shoe(): penetration must be in (0, 1]')
+        self.decks = decks
+        self.rng = rng
+        self._codes = bytearray(range(52)) * decks
+        self._size = len(self._codes)
+        self._next = 0
+        self.cut = max(1, int(self._size * penetration))
+        self.shuffles = 0
+
+    def deal_code(self):
+        #Code of the next card.
+
+        i = self._next
+        if i >= self._size:
+            raise IndexError('Shoe: no cards left')
+        codes = self._codes
+        j = i + int(self.rng.random() * (self._size - i))
+        code = codes[j]
+        codes[j] = codes[i]
+        codes[i] = code
+        self._next = i + 1
+        return code
+
+    def deal(self):
+        return CARDS[self.deal_code()]
+
+    def burn(self):
+        self.deal_code()
+
+    @property
+    def needs_shuffle(self):
+        #True once the cut card has come out.
+
+        return self._next >= self.cut
+
+    def reshuffle(self):
+        self._next = 0
+        self.shuffles += 1
+
+    @property
+    def dealt(self):
+        return self._next
+
+    def __len__(self):
+        return self._size - self._next
+
+
+class PokerHand(object):
+    #Compute the best hand from given cards, implementing traditional
+    #high" poker hand ranks.  Given six or seven cards, the hand is the
+    #best five of them.
+
+    #Set to a callable taking a tuple of card codes (evaluator.evaluate
+    #itself, a functools.lru_cache of it or an iso.IsoCache) to look
+    #strengths up through it.  It is called as a plain function, never
+    #bound to the hand.
+    cache = None
+
+    def __init__(self, cards, evaluate=True):
+        cards.sort(reverse=True)
+        self.cards = cards
+        if evaluate:
+            self.evaluate()
+
+    def evaluate(self):
+        #Evaluate the rank of the hand.
+        
+        self._eval_hand_rank()
+        self._fill_kickers()
+
+    def _fill_kickers(self):  # If hands are tied find winner
+        hand_count = len(self.hand_cards)
+        kicker_count = 5 - hand_count
+        if kicker_count > 0:
+            kickers = self.best_cards[:]
+            for card in self.hand_cards:
+                kickers.remove(card)
+            self.kickers = kickers[:kicker_count]
+        else:
+            self.kickers = []
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("kickers: %s", f_list(self.kickers))
+            logger.debug("--- -------------- ---")
+
+    def _best_five(self, codes):
+        # The five cards behind self.strength, when given more than five.
+        if len(self.cards) == 5:
+            return self.cards
+        if self.hand_rank in (evaluator.STRAIGHT_FLUSH, evaluator.FLUSH):
+            suit = suits[evaluator.flush_suit(codes)]
+            pool = [c for c in self.cards if c.suit == suit]
+        else:
+            pool = self.cards[:]
+        best = []
+        for rank_index in evaluator.class_ranks(self.strength):
+            rank = ranks[rank_index]
+            for card in pool:
+                if card.rank == rank:
+                    pool.remove(card)
+                    best.append(card)
+                    break
+        best.sort(reverse=True)
+        return best
+
+    def _eval_hand_rank(self):
+        codes = tuple(card.code for card in self.cards)
+        cache = type(self).cache
+        if cache is not None:
+            self.strength = cache(codes)
+        else:
+            self.strength = evaluator.evaluate(codes)
+        self.hand_rank = evaluator.category(self.strength)
+        self.best_cards = self._best_five(codes)
+        if self.hand_rank in (evaluator.STRAIGHT_FLUSH, evaluator.FLUSH,
+                              evaluator.STRAIGHT):
+            self.hand_cards = self.best_cards[:]
+        elif self.hand_rank == evaluator.HIGH_CARD:
+            self.hand_cards = [self.best_cards[0]]
+        else:
+            # paired cards, bigger groups first (trips before the pair
+            # of a full house), higher ranks first within a group size
+            counts = {}
+            for card in self.best_cards:
+                counts[card.rank] = counts.get(card.rank, 0) + 1
+            self.hand_cards = [c for c in self.best_cards
+                               if counts[c.rank] > 1]
+            self.hand_cards.sort(key=lambda c: counts[c.rank], reverse=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("--- Evaluating %s ---", f_list(self.cards))
+            logger.debug("* %s: %s",
+                         evaluator.CATEGORY_NAMES[self.hand_rank],
+                         f_list(self.hand_cards))
+
+    def __str__(self):
+        return '[%s]' % f_list(self.cards)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.__str__())
+
+    # Hands order by strength, a single int that already encodes the
+    # category, the hand cards and the kickers (see evaluator.py), so
+    # comparisons, sorted() and max() never look at the cards.
+
+    def __hash__(self):
+        return self.strength
+
+    def __eq__(self, obj):
+        return self.strength == obj.strength
+
+    def __ne__(self, obj):
+        return self.strength != obj.strength
+
+    def __lt__(self, obj):
+        return self.strength < obj.strength
+
+    def __le__(self, obj):
+        return self.strength <= obj.strength
+
+    def __gt__(self, obj):
+        return self.strength > obj.strength
+
+    def __ge__(self, obj):
+        return self.strength >= obj.strength
+
+
+def winners(hands):
+    #Indices of the best of a table of PokerHands (more than one on a tie),
+    #in one pass.
+
+    best = 0
+    found = []
+    for i, hand in enumerate(hands):
+        strength = hand.strength
+        if strength > best:
+            best = strength
+            found = [i]
+        elif strength == best:
+            found.append(i)
+    return found
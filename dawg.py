@@ -0,0 +1,353 @@
+#A compact DAWG (minimal acyclic word graph) of dic.txt.
+#
+#The words are built into a minimal automaton (Daciuk et al.'s incremental
+#algorithm for sorted input: common suffixes are shared as well as common
+#prefixes) and stored in dic.dawg as a flat array of 32-bit edges:
+#
+#    bits 0-4   letter (0 is 'a')
+#    bit 5      a word ends after this letter
+#    bit 6      last edge of its node
+#    bits 7-31  index of the child node's first edge, 0 for none
+#
+#The edges of a node are contiguous and sorted by letter; the root's start
+#at index 1.  The file is memory mapped, so the whole dictionary costs
+#about a megabyte instead of the tens of megabytes of a list of strings,
+#and like dic.idx it is rebuilt whenever dic.txt changes.
+#
+#Membership and prefix lookups walk one edge run per letter.  match()
+#enumerates words fitting a hangman pattern.  random_word() samples
+#uniformly among the words of a length using, per remaining length r, the
+#number of words completing below each node in exactly r more letters;
+#those counts are built with NumPy the first time a length is asked for
+#(4 bytes per node per letter of the longest length asked for so far, plus
+#the start of each node's edges).
+
+import bisect
+import mmap
+import os
+import random
+import struct
+
+import wordlist
+
+MAGIC = b'DAWG'
+VERSION = 1
+_HEADER = struct.Struct('<4sIQQI')
+
+TERMINAL = 1 << 5
+LAST = 1 << 6
+_LETTER = 0x1f
+_SHIFT = 7
+
+A = ord('a')
+
+
+class _Node(object):
+    __slots__ = ('final', 'edges')
+
+    def __init__(self):
+        self.final = False
+        self.edges = {}
+
+    def key(self):
+        return (self.final,
+                tuple((c, id(child)) for c, child in self.edges.items()))
+
+
+def _minimize(unchecked, register, down_to):
+    while len(unchecked) > down_to:
+        parent, letter, child = unchecked.pop()
+        key = child.key()
+        if key in register:
+            parent.edges[letter] = register[key]
+        else:
+            register[key] = child
+
+
+def compile_dawg(words, stamp=(0, 0)):
+    #The dic.dawg form of words (which must be sorted), as bytes.
+
+    root = _Node()
+    register = {}
+    unchecked = []
+    previous = ''
+    for word in words:
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        _minimize(unchecked, register, common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _Node()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    _minimize(unchecked, register, 0)
+
+    # lay the nodes out breadth first, one run of edges each
+    starts = {}
+    order = []
+    queue = [root]
+    next_start = 1
+    for node in queue:
+        starts[id(node)] = next_start
+        next_start += len(node.edges)
+        order.append(node)
+        for child in node.edges.values():
+            if child.edges and id(child) not in starts:
+                starts[id(child)] = None
+                queue.append(child)
+    edges = [0]
+    for node in order:
+        letters = sorted(node.edges)
+        for i, letter in enumerate(letters):
+            child = node.edges[letter]
+            edge = ord(letter) - A
+            if child.final:
+                edge |= TERMINAL
+            if i == len(letters) - 1:
+                edge |= LAST
+            if child.edges:
+                edge |= starts[id(child)] << _SHIFT
+            edges.append(edge)
+    return (_HEADER.pack(MAGIC, VERSION, stamp[0], stamp[1], len(edges)) +
+            struct.pack('<%dI' % len(edges), *edges))
+
+
+def dawg_path(source):
+    return os.path.splitext(source)[0] + '.dawg'
+
+
+class Dawg(object):
+    def __init__(self, source=wordlist.DIC_PATH):
+        self.source = source
+        self._data = self._open()
+        magic, version, size, mtime, count = _HEADER.unpack_from(self._data)
+        self.edges = memoryview(self._data)[_HEADER.size:].cast('I')
+        self._counts = None
+
+    def _open(self):
+        stamp = wordlist.source_stamp(self.source)
+        path = dawg_path(self.source)
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if _HEADER.unpack_from(data)[:4] == (MAGIC, VERSION) + stamp:
+                return data
+            data.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+        with open(self.source) as f:
+            words = sorted(set(line.strip().lower() for line in f) - {''})
+        compiled = compile_dawg(words, stamp)
+        try:
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(compiled)
+            os.replace(tmp, path)
+        except OSError:
+            return compiled
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def nbytes(self):
+        #Memory held by the graph and any sampling counts.
+
+        size = self.edges.nbytes
+        if self._counts:
+            size += self._run_starts.nbytes
+            size += sum(c.nbytes for c in self._counts)
+        return size
+
+    def _find(self, start, letter):
+        edges = self.edges
+        i = start
+        while i:
+            edge = edges[i]
+            if edge & _LETTER == letter:
+                return edge
+            if edge & LAST:
+                return 0
+            i += 1
+        return 0
+
+    def _walk(self, prefix):
+        #Edge reached by the last letter of prefix, or 0.
+        start = 1
+        edge = 0
+        for ch in prefix:
+            edge = self._find(start, ord(ch) - A)
+            if not edge:
+                return 0
+            start = edge >> _SHIFT
+        return edge
+
+    def __contains__(self, word):
+        word = word.lower()
+        if not word.isalpha() or not word.isascii():
+            return False
+        return bool(self._walk(word) & TERMINAL)
+
+    def has_prefix(self, prefix):
+        prefix = prefix.lower()
+        return prefix == '' or bool(self._walk(prefix))
+
+    def _suffixes(self, start, prefix):
+        edges = self.edges
+        i = start
+        while i:
+            edge = edges[i]
+            word = prefix + chr(A + (edge & _LETTER))
+            if edge & TERMINAL:
+                yield word
+            if edge >> _SHIFT:
+                for w in self._suffixes(edge >> _SHIFT, word):
+                    yield w
+            if edge & LAST:
+                break
+            i += 1
+
+    def prefixed(self, prefix):
+        #Every word starting with prefix, in order.
+
+        prefix = prefix.lower()
+        if not prefix:
+            return list(self._suffixes(1, ''))
+        edge = self._walk(prefix)
+        words = []
+        if edge & TERMINAL:
+            words.append(prefix)
+        if edge >> _SHIFT:
+            words.extend(self._suffixes(edge >> _SHIFT, prefix))
+        return words
+
+    def match(self, pattern, exclude=''):
+        #Words fitting a hangman pattern ('_' for an unknown letter) where
+        #the unknown letters are none of the revealed letters or exclude.
+
+        pattern = pattern.lower()
+        banned = set(ord(c) - A for c in set(pattern + exclude.lower()) - {'_'})
+        wanted = [None if c == '_' else ord(c) - A for c in pattern]
+        found = []
+        last = len(wanted) - 1
+
+        def walk(start, depth, prefix):
+            edges = self.edges
+            i = start
+            while i:
+                edge = edges[i]
+                letter = edge & _LETTER
+                want = wanted[depth]
+                if (letter == want if want is not None
+                        else letter not in banned):
+                    word = prefix + chr(A + letter)
+                    if depth == last:
+                        if edge & TERMINAL:
+                            found.append(word)
+                    elif edge >> _SHIFT:
+                        walk(edge >> _SHIFT, depth + 1, word)
+                if edge & LAST:
+                    break
+                i += 1
+
+        if wanted:
+            walk(1, 0, '')
+        return found
+
+    def _length_counts(self, length):
+        #self._counts[r][k]: words completing in exactly r + 1 letters from
+        #node k (the k-th run of edges, in order).
+        import numpy as np
+
+        if self._counts is None:
+            edges = np.frombuffer(self.edges, dtype=np.uint32)
+            # node runs: an edge starts one when the previous edge was last
+            first = np.ones(len(edges), dtype=bool)
+            first[0] = False
+            first[2:] = (edges[1:-1] & LAST) != 0
+            self._run_starts = np.flatnonzero(first).astype(np.uint32)
+            self._runs = memoryview(self._run_starts)
+            terminal = ((edges & TERMINAL) != 0).astype(np.uint32)
+            terminal[0] = 0
+            self._counts = [np.add.reduceat(terminal, self._run_starts,
+                                             dtype=np.uint32)]
+        if len(self._counts) < length:
+            edges = np.frombuffer(self.edges, dtype=np.uint32)
+            children = edges >> _SHIFT
+            has_child = children != 0
+            child_run = np.searchsorted(self._run_starts,
+                                        children[has_child]).astype(np.uint32)
+            del children
+            below = np.zeros(len(edges), dtype=np.uint32)
+            while len(self._counts) < length:
+                below[has_child] = self._counts[-1][child_run]
+                self._counts.append(np.add.reduceat(below, self._run_starts,
+                                                    dtype=np.uint32))
+        return self._counts
+
+    def count(self, length):
+        #Number of words of a length.
+
+        if length < 1:
+            return 0
+        return int(self._length_counts(length)[length - 1][0])
+
+    def _run(self, start):
+        i = start
+        while True:
+            yield i
+            if self.edges[i] & LAST:
+                return
+            i += 1
+
+    def random_word(self, min_len=5, max_len=10, rng=random):
+        #A uniformly random word of min_len to max_len letters.
+
+        lengths = list(range(max(min_len, 1), max_len + 1))
+        totals = [self.count(n) for n in lengths]
+        if not sum(totals):
+            raise ValueError('Dawg.random_word(): no words of that length')
+        pick = int(rng.random() * sum(totals))
+        for length, total in zip(lengths, totals):
+            if pick < total:
+                break
+            pick -= total
+        counts = self._length_counts(length)
+        edges = self.edges
+        # the number of the node whose edges start at an index
+        node = bisect.bisect_left
+        runs = self._runs
+        word = []
+        start = 1
+        for r in range(length - 1, -1, -1):
+            # words completing below each edge in exactly r more letters
+            row = memoryview(counts[r - 1]) if r else None
+            for i in self._run(start):
+                edge = edges[i]
+                if not r:
+                    n = 1 if edge & TERMINAL else 0
+                elif edge >> _SHIFT:
+                    n = row[node(runs, edge >> _SHIFT)]
+                else:
+                    n = 0
+                if pick < n:
+                    break
+                pick -= n
+            word.append(chr(A + (edge & _LETTER)))
+            start = edge >> _SHIFT
+        return ''.join(word)
+
+
+_default = None
+
+
+def default():
+    global _default
+    if _default is None:
+        _default = Dawg()
+    return _default
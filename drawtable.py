@@ -0,0 +1,149 @@
+#Precomputed best discards for five card draw.
+#
+#For every five card hand the table holds the hold/discard choice (one of
+#32) with the highest exact expected value, where the value of a final hand
+#is the chance that it beats a random five card hand (a tie counts 1/2).
+#
+#The expected values are computed once, by build(), over the 134,459 suit
+#canonical hands: every hand whose suits are a relabelling of another gets
+#the same decision.  build() sums the value of every final hand into each
+#of its 32 subsets, after which the expected value of keeping some cards is
+#an inclusion-exclusion over the discarded ones (3**5 = 243 lookups per
+#hand for all 32 choices).  The decisions are then mapped back onto all
+#2,598,960 hands and written to draw_table.bin, one byte per hand indexed
+#by the hand's colex rank (see iso.colex()).  Bit j of the byte is set
+#when the j-th card, in card code order, is kept.
+#
+#The file ships with the game.  Queries mmap it on first use, so startup
+#costs nothing and a lookup is a colex rank and a byte read.  Building needs
+#NumPy and takes well under a minute:
+#
+#    python drawtable.py
+
+import mmap
+import os
+from itertools import combinations, permutations
+
+from iso import BINOM
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'draw_table.bin')
+MAGIC = b'DRAW\x01\x00\x00\x00'
+HAND_COUNT = 2598960
+
+_table = None
+
+
+def _load(path=TABLE_PATH):
+    global _table
+    with open(path, 'rb') as f:
+        table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if table[:len(MAGIC)] != MAGIC or len(table) != len(MAGIC) + HAND_COUNT:
+        raise ValueError('%s: not a draw table' % path)
+    _table = table
+
+
+def best_hold(codes):
+    #Hold mask for five card codes: bit j set means keep the j-th smallest
+    #code.
+
+    if _table is None:
+        _load()
+    a, b, c, d, e = sorted(codes)
+    # iso.colex(), unrolled
+    index = (BINOM[a][1] + BINOM[b][2] + BINOM[c][3] + BINOM[d][4] +
+             BINOM[e][5])
+    return _table[len(MAGIC) + index]
+
+
+def optimal_draw(cards):
+    #Draw strategy for the engine: indices of the cards to keep.
+
+    order = sorted(range(5), key=lambda i: cards[i].code)
+    mask = best_hold([card.code for card in cards])
+    return [order[j] for j in range(5) if mask >> j & 1]
+
+
+def _colex(np, hands):
+    #Colex ranks of the rows of an (N, k) array of ascending codes.
+    binom = np.array(BINOM, dtype=np.int64)
+    index = np.zeros(len(hands), dtype=np.int64)
+    for i in range(hands.shape[1]):
+        index += binom[hands[:, i], i + 1]
+    return index
+
+
+def build(path=TABLE_PATH):
+    import numpy as np
+    import batch
+
+    binom = BINOM
+    # every hand, in colex order
+    hands = np.array(list(combinations(range(52), 5)), dtype=np.uint8)
+    hands = hands[np.argsort(_colex(np, hands))]
+
+    # value of each final hand against a random hand
+    strengths = batch.evaluate_batch(hands)[0]
+    counts = np.bincount(strengths, minlength=7463)
+    below = np.cumsum(counts) - counts
+    value = (below[strengths] + counts[strengths] / 2.0) / HAND_COUNT
+
+    # totals[k][x]: summed value of the final hands containing the k-subset
+    # with colex rank x
+    totals = [np.array([value.sum()])]
+    for k in range(1, 5):
+        total = np.zeros(binom[51][k] + binom[51][k - 1], dtype=np.float64)
+        for positions in combinations(range(5), k):
+            total += np.bincount(_colex(np, hands[:, positions]),
+                                 weights=value, minlength=len(total))
+        totals.append(total)
+    totals.append(value)
+
+    # suit canonical form: the smallest colex rank over the 24 relabellings
+    codes = np.arange(52)
+    best = None
+    for perm in permutations(range(4)):
+        relabel = (np.array(perm)[codes // 13] * 13 + codes % 13)
+        relabelled = relabel[hands]
+        order = np.argsort(relabelled, axis=1, kind='stable')
+        rank = _colex(np, np.take_along_axis(relabelled, order, axis=1))
+        if best is None:
+            best, best_order = rank, order
+        else:
+            better = rank < best
+            best = np.where(better, rank, best)
+            best_order[better] = order[better]
+        del relabelled
+    canonical, inverse = np.unique(best, return_inverse=True)
+    canonical_hands = hands[canonical]
+
+    # exact EV of each of the 32 holds of each canonical hand
+    ev = np.zeros((len(canonical), 32))
+    for mask in range(32):
+        kept = [j for j in range(5) if mask >> j & 1]
+        thrown = [j for j in range(5) if not mask >> j & 1]
+        for r in range(len(thrown) + 1):
+            for extra in combinations(thrown, r):
+                positions = sorted(kept + list(extra))
+                if positions:
+                    index = _colex(np, canonical_hands[:, positions])
+                else:
+                    index = np.zeros(len(canonical), dtype=np.int64)
+                ev[:, mask] += (-1) ** r * totals[len(positions)][index]
+        ev[:, mask] /= binom[47][5 - len(kept)] if len(kept) < 5 else 1
+    canonical_masks = np.argmax(ev, axis=1)
+
+    # back to every hand: canonical position i is position order[i]
+    masks = np.zeros(HAND_COUNT, dtype=np.uint8)
+    chosen = canonical_masks[inverse]
+    for i in range(5):
+        masks |= (((chosen >> i) & 1) << best_order[:, i]).astype(np.uint8)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(masks.tobytes())
+    return len(canonical)
+
+
+if __name__ == '__main__':
+    print('%d canonical hands' % build())
@@ -0,0 +1,309 @@
+#Five card draw without the GUI.
+#
+#GameState is one game between the player and the computer, moved along
+#with step(action, arg).  It follows the rules of fiveCardPoker: both sides
+#ante 5, the player may bet or check (the computer always matches a bet),
+#the player discards and draws, there is a second round of betting, and the
+#computer takes the pot unless the player's hand is strictly better.  The
+#game is over once a side can't cover the ante.
+#
+#Phases and the actions they accept:
+#
+#    DEAL        CONTINUE           ante up and deal a new hand
+#    FIRST_BET   BET amount, CHECK
+#    DISCARD     DRAW indices       indices of the player's cards to replace
+#    SECOND_BET  BET amount, CHECK
+#    SHOWDOWN    CONTINUE           settle the pot
+#    OVER        -
+#
+#step() returns a list of events describing what happened, for the front end
+#to show:
+#
+#    ('ante', amount), ('matched', amount), ('discarded', count),
+#    ('won', pot), ('lost', pot), ('game_won', money), ('game_lost', money)
+#
+#A GameState can be given a recorder, called with a HandResult after every
+#showdown (history.py writes them to a file, handstore.py to SQLite).
+#
+#play() runs whole games headless with pluggable strategies:
+#
+#    python engine.py --hands 1000000 --history hands.bin --db hands.db
+
+import argparse
+import numbers
+import random
+import time
+from collections import namedtuple
+
+from cards import Deck, PokerHand
+from drawtable import optimal_draw
+
+ANTE = 5
+START_MONEY = 500
+
+DEAL = 'deal'
+FIRST_BET = 'first bet'
+DISCARD = 'discard'
+SECOND_BET = 'second bet'
+SHOWDOWN = 'showdown'
+OVER = 'over'
+
+BET = 'bet'
+CHECK = 'check'
+DRAW = 'draw'
+CONTINUE = 'continue'
+
+#One settled hand.  Cards are tuples of card codes: as dealt and as shown
+#down, for each side.  bets are the player's first and second round bets
+#(matched by the computer), pot what was at stake, won whether the player
+#took it and money the player's stack afterwards.
+HandResult = namedtuple('HandResult', [
+    'player_dealt', 'player', 'computer_dealt', 'computer', 'bets', 'pot',
+    'won', 'money'])
+
+
+def _is_int(value):
+    #Bets and discard indices are whole numbers; True and 0.5 are not.
+
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+
+
+def stand_pat(cards):
+    #Draw strategy: keep all five cards (what the computer has always done).
+
+    return range(5)
+
+
+class GameState(object):
+    def __init__(self, computer_draw=stand_pat, rng=random,
+                 money=START_MONEY, recorder=None):
+        self.computer_draw = computer_draw
+        self.rng = rng
+        self.recorder = recorder
+        self.money = money
+        self.cmoney = money
+        self.pot = 0
+        self.player = []
+        self.computer = []
+        self.deck = Deck()
+        self.phase = DEAL
+        self.hands = 0
+        self._dealt = None
+        self._bets = [0, 0]
+
+    def max_bet(self):
+        return min(self.money, self.cmoney)
+
+    def legal_actions(self):
+        if self.phase in (FIRST_BET, SECOND_BET):
+            if self.max_bet() > 0:
+                return [BET, CHECK]
+            return [CHECK]
+        if self.phase == DISCARD:
+            return [DRAW]
+        if self.phase in (DEAL, SHOWDOWN):
+            return [CONTINUE]
+        return []
+
+    def step(self, action, arg=None):
+        if action not in self.legal_actions():
+            raise ValueError('GameState.step(): %r not allowed in phase %r'
+                             % (action, self.phase))
+        if action == CONTINUE:
+            if self.phase == DEAL:
+                return self._deal()
+            return self._showdown()
+        if action == DRAW:
+            return self._draw(arg or ())
+        events = []
+        if action == BET:
+            events = self._bet(arg)
+        self.phase = DISCARD if self.phase == FIRST_BET else SHOWDOWN
+        return events
+
+    def _deal(self):
+        self.deck.reset_and_shuffle(self.rng)
+        self.player = [self.deck.pop() for i in range(5)]
+        self.computer = [self.deck.pop() for i in range(5)]
+        self.player.sort()
+        self.computer.sort()
+        if self.recorder is not None:
+            self._dealt = (tuple(card.code for card in self.player),
+                           tuple(card.code for card in self.computer))
+            self._bets = [0, 0]
+        self.pot += 2 * ANTE
+        self.money -= ANTE
+        self.cmoney -= ANTE
+        self.hands += 1
+        self.phase = FIRST_BET
+        return [('ante', ANTE)]
+
+    def _bet(self, amount):
+        if not _is_int(amount) or not 1 <= amount <= self.max_bet():
+            raise ValueError('GameState.step(): bet must be between 1 and %d'
+                             % self.max_bet())
+        amount = int(amount)
+        self._bets[0 if self.phase == FIRST_BET else 1] += amount
+        self.money -= amount
+        self.cmoney -= amount
+        self.pot += amount * 2
+        return [('matched', amount)]
+
+    def _draw(self, indices):
+        # check them all before the first card leaves the deck
+        try:
+            indices = list(indices)
+        except TypeError:
+            indices = [None]
+        if any(not _is_int(i) or not 0 <= i < 5 for i in indices):
+            raise ValueError('GameState.step(): discard indices must be 0-4')
+        indices = set(indices)
+        for i in sorted(indices):
+            self.player[i] = self.deck.pop()
+        kept = [self.computer[i] for i in self.computer_draw(self.computer)]
+        while len(kept) < 5:
+            kept.append(self.deck.pop())
+        self.computer = kept
+        self.phase = SECOND_BET
+        return [('discarded', len(indices))]
+
+    def _showdown(self):
+        pot = self.pot
+        self.pot = 0
+        pval = PokerHand(self.player[:]).strength
+        cval = PokerHand(self.computer[:]).strength
+        if pval > cval:
+            self.money += pot
+            events = [('won', pot)]
+        else:
+            self.cmoney += pot
+            events = [('lost', pot)]
+        if self.recorder is not None:
+            self.recorder(HandResult(
+                self._dealt[0], tuple(card.code for card in self.player),
+                self._dealt[1], tuple(card.code for card in self.computer),
+                tuple(self._bets), pot, pval > cval, self.money))
+        if self.cmoney < ANTE:
+            self.phase = OVER
+            events.append(('game_won', self.money))
+        elif self.money < ANTE:
+            self.phase = OVER
+            events.append(('game_lost', self.money))
+        else:
+            self.phase = DEAL
+        return events
+
+    def winner(self):
+        #'player' or 'computer' once the game is over, else None.
+
+        if self.phase != OVER:
+            return None
+        return 'player' if self.money > self.cmoney else 'computer'
+
+
+#Player strategies: called with the GameState whenever the player has to
+#act, return (action, arg).
+
+def check_and_stand(game):
+    if game.phase == DISCARD:
+        return DRAW, ()
+    return CHECK, None
+
+
+def pair_hunter(game):
+    #Bet 10 with a pair or better, otherwise check; throw away every card
+    #that doesn't pair up.
+    hand = PokerHand(game.player[:])
+    if game.phase == DISCARD:
+        if hand.hand_rank >= 4:
+            return DRAW, ()
+        keep = set(hand.hand_cards)
+        if hand.hand_rank == 0:
+            keep = set()
+        return DRAW, [i for i, c in enumerate(game.player) if c not in keep]
+    if hand.hand_rank > 0 and BET in game.legal_actions():
+        return BET, min(10, game.max_bet())
+    return CHECK, None
+
+
+STRATEGIES = {
+    'check': check_and_stand,
+    'pairs': pair_hunter,
+}
+
+COMPUTER_DRAWS = {
+    'pat': stand_pat,
+    'optimal': optimal_draw,
+}
+
+
+def play(hands, player=check_and_stand, computer_draw=stand_pat, seed=None,
+         recorder=None):
+    #Play games back to back until the given number of hands is dealt.
+    #recorder, if given, gets every HandResult.  Returns a dict of totals.
+
+    rng = random.Random(seed)
+    stats = {'hands': 0, 'hands_won': 0, 'games': 0, 'games_won': 0}
+    start = time.time()
+    game = GameState(computer_draw, rng, recorder=recorder)
+    while True:
+        if game.phase == OVER:
+            stats['games'] += 1
+            if game.winner() == 'player':
+                stats['games_won'] += 1
+            if stats['hands'] >= hands:
+                break
+            game = GameState(computer_draw, rng, recorder=recorder)
+        elif game.phase == DEAL:
+            if stats['hands'] >= hands:
+                break
+            game.step(CONTINUE)
+            stats['hands'] += 1
+        elif game.phase == SHOWDOWN:
+            if game.step(CONTINUE)[0][0] == 'won':
+                stats['hands_won'] += 1
+        else:
+            game.step(*player(game))
+    stats['seconds'] = time.time() - start
+    stats['hands_per_hour'] = stats['hands'] / stats['seconds'] * 3600
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless five card draw.')
+    parser.add_argument('--hands', type=int, default=100000)
+    parser.add_argument('--player', choices=sorted(STRATEGIES),
+                        default='check')
+    parser.add_argument('--computer', choices=sorted(COMPUTER_DRAWS),
+                        default='optimal')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--history',
+                        help='append every hand to this hand history file')
+    parser.add_argument('--db',
+                        help='store every hand in this SQLite database')
+    args = parser.parse_args()
+
+    sinks = []
+    if args.history:
+        import history
+        sinks.append(history.HistoryWriter(args.history))
+    if args.db:
+        import handstore
+        sinks.append(handstore.HandStore(args.db))
+
+    def record(hand):
+        for sink in sinks:
+            sink.write(hand)
+    try:
+        stats = play(args.hands, STRATEGIES[args.player],
+                     COMPUTER_DRAWS[args.computer], seed=args.seed,
+                     recorder=record if sinks else None)
+    finally:
+        for sink in sinks:
+            sink.close()
+    print('%(hands)d hands, %(hands_won)d won; %(games)d games, '
+          '%(games_won)d won; %(hands_per_hour).0f hands/hour' % stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+#Monte Carlo equity for five card draw.
+#
+#equity() answers "how often does this hand beat a random opponent after the
+#draw?".  Each trial deals the opponent five cards from the rest of the deck,
+#replaces the cards the hero throws away, lets the opponent draw with its own
+#strategy and compares the two PokerHands.  A win counts 1, a tie 1/2.
+#
+#Trials run in fixed size batches on a process pool.  Batch i always uses
+#random.Random(seed * 2**32 + i) and results are consumed in batch order, so
+#a run is reproducible for a given seed whatever the number of processes.
+#Between batches the 95% confidence interval is checked and the run stops
+#early once its half width is below the target.
+#
+#exact_equity() enumerates instead of sampling, for the cases small enough
+#to walk: the hero's draws times every completion of the opponent's hand
+#(known opponent cards can be given).  Standing pat against all 1,533,939
+#possible opponent hands takes a few seconds.  The opponent completions are
+#addressed by their index in the combinatorial number system (colex order),
+#so the work splits into index ranges that run on the process pool, and
+#each range is walked in place by stepping one combination to the next.
+#The result of a walk is a histogram of opponent strengths, which is
+#memoized on the suit canonical form of the cards involved (see iso.py):
+#later calls with the same cards out, up to a relabelling of the suits
+#(another hold of the same hand, or a draw that only differs in suits),
+#reuse it.
+#
+#    python equity.py AS KS QS JS 9H --hold 0 1 2 3 --trials 200000
+#    python equity.py AS KS QS JS 9H --exact
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+from collections import namedtuple, OrderedDict
+from itertools import combinations
+
+import evaluator
+import iso
+from cards import Card, Deck, PokerHand
+from engine import stand_pat
+
+BATCH_SIZE = 2000
+Z_95 = 1.96
+#Opponent completions per exact_equity() job, and how many strength
+#histograms to keep.
+RANGE_SIZE = 100000
+HISTOGRAM_CACHE_SIZE = 64
+
+EquityResult = namedtuple('EquityResult', [
+    'equity', 'half_width', 'trials', 'wins', 'ties', 'seconds',
+    'trials_per_sec'])
+
+
+def _run_batch(args):
+    hand, hold, opponent, trials, seed = args
+    rng = random.Random(seed)
+    kept = [hand[i] for i in hold]
+    draws = 5 - len(kept)
+    wins = ties = 0
+    deck = Deck()
+    for i in range(trials):
+        deck.reset_and_shuffle(rng)
+        deck.remove(hand)
+        opp = [deck.pop() for j in range(5)]
+        mine = kept + [deck.pop() for j in range(draws)]
+        opp_kept = [opp[j] for j in opponent(opp)]
+        theirs = opp_kept + [deck.pop() for j in range(5 - len(opp_kept))]
+        a = PokerHand(mine).strength
+        b = PokerHand(theirs).strength
+        if a > b:
+            wins += 1
+        elif a == b:
+            ties += 1
+    return trials, wins, ties
+
+
+def _batches(hand, hold, opponent, trials, seed):
+    index = 0
+    while trials > 0:
+        n = min(BATCH_SIZE, trials)
+        yield hand, hold, opponent, n, seed * 2 ** 32 + index
+        trials -= n
+        index += 1
+
+
+def equity(hand, hold=range(5), opponent=stand_pat, trials=100000,
+           half_width=0.005, min_trials=10000, seed=0, processes=None):
+    #Estimate the equity of hand (five Cards) when keeping the cards at
+    #the indices in hold.  Runs at most trials trials and stops early once
+    #the 95% confidence interval is within +/- half_width.  opponent must be
+    #a module level function (it is sent to the worker processes).
+
+    hand = list(hand)
+    hold = list(hold)
+    if len(hand) != 5 or len(set(hand)) != 5:
+        raise ValueError('equity(): expected five different cards')
+    if any(not 0 <= i < 5 for i in hold):
+        raise ValueError('equity(): hold indices must be 0-4')
+
+    start = time.time()
+    n = wins = ties = 0
+    pool = multiprocessing.Pool(processes)
+    try:
+        for t, w, d in pool.imap(_run_batch,
+                                 _batches(hand, hold, opponent, trials, seed)):
+            n += t
+            wins += w
+            ties += d
+            if n >= min_trials and _half_width(n, wins, ties) <= half_width:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+    seconds = time.time() - start
+    return EquityResult((wins + ties / 2.0) / n, _half_width(n, wins, ties),
+                        n, wins, ties, seconds, n / seconds)
+
+
+def _half_width(n, wins, ties):
+    p = (wins + ties / 2.0) / n
+    variance = (wins + ties / 4.0) / n - p * p
+    return Z_95 * math.sqrt(max(variance, 0.0) / n)
+
+
+def unrank(index, k):
+    #The k-combination of range(n) with the given colex index.
+
+    binom = iso.BINOM
+    combo = [0] * k
+    for i in range(k, 0, -1):
+        c = i - 1
+        while binom[c + 1][i] <= index:
+            c += 1
+        combo[i - 1] = c
+        index -= binom[c][i]
+    return combo
+
+
+def rank(combo):
+    #Colex index of a sorted combination; the inverse of unrank().
+
+    return iso.colex(combo)
+
+
+def _walk_range(args):
+    #Histogram of the strengths of fixed + every k-combination of pool with
+    #colex index in [lo, hi).
+    fixed, pool, k, lo, hi = args
+    histogram = [0] * (evaluator.HAND_COUNT + 1)
+    if k == 0:
+        histogram[evaluator.evaluate(fixed)] += hi - lo
+        return histogram
+    combo = unrank(lo, k)
+    evaluate = evaluator.evaluate
+    evaluate5 = evaluator.evaluate5
+    for index in range(lo, hi):
+        if k == 5:
+            histogram[evaluate5(pool[combo[0]], pool[combo[1]],
+                                pool[combo[2]], pool[combo[3]],
+                                pool[combo[4]])] += 1
+        else:
+            histogram[evaluate(fixed + [pool[c] for c in combo])] += 1
+        # step to the next combination in colex order
+        j = 0
+        while j < k - 1 and combo[j] + 1 == combo[j + 1]:
+            combo[j] = j
+            j += 1
+        combo[j] += 1
+    return histogram
+
+
+_histograms = OrderedDict()
+
+
+def _opponent_histogram(fixed, pool, pool_map):
+    #Strength histogram over every way to complete the opponent's known
+    #cards (fixed) from pool, memoized on the class of (fixed, pool).
+    key = iso.canonical(fixed, pool)
+    if key in _histograms:
+        _histograms.move_to_end(key)
+        return _histograms[key]
+    k = 5 - len(fixed)
+    total = iso.BINOM[len(pool)][k]
+    jobs = [(list(fixed), list(pool), k, lo, min(lo + RANGE_SIZE, total))
+            for lo in range(0, total, RANGE_SIZE)]
+    histogram = [0] * (evaluator.HAND_COUNT + 1)
+    for part in pool_map(_walk_range, jobs):
+        for strength, count in enumerate(part):
+            histogram[strength] += count
+    _histograms[key] = histogram
+    if len(_histograms) > HISTOGRAM_CACHE_SIZE:
+        _histograms.popitem(last=False)
+    return histogram
+
+
+def exact_equity(hand, hold=range(5), opponent=(), processes=None):
+    #Exact equity of hand (five Cards) keeping the cards at the indices in
+    #hold, against every completion of the opponent's known cards, with
+    #every possible draw for the hero.  The opponent stands pat.
+
+    hand = list(hand)
+    hold = list(hold)
+    opponent = list(opponent)
+    if len(hand) != 5 or len(set(hand + opponent)) != 5 + len(opponent):
+        raise ValueError('exact_equity(): expected five different cards')
+    if any(not 0 <= i < 5 for i in hold):
+        raise ValueError('exact_equity(): hold indices must be 0-4')
+
+    start = time.time()
+    dead = set(card.code for card in hand + opponent)
+    pool = [code for code in range(52) if code not in dead]
+    kept = [hand[i].code for i in hold]
+    fixed = [card.code for card in opponent]
+    n = wins = ties = 0
+    workers = None
+    try:
+        for draw in combinations(pool, 5 - len(kept)):
+            mine = evaluator.evaluate(kept + list(draw))
+            rest = [code for code in pool if code not in draw]
+            key = iso.canonical(fixed, rest)
+            if key not in _histograms and workers is None:
+                workers = multiprocessing.Pool(processes)
+            histogram = _opponent_histogram(
+                fixed, rest, workers.imap if workers else map)
+            n += sum(histogram)
+            wins += sum(histogram[:mine])
+            ties += histogram[mine]
+    finally:
+        if workers is not None:
+            workers.terminate()
+            workers.join()
+    seconds = time.time() - start
+    return EquityResult((wins + ties / 2.0) / n, 0.0, n, wins, ties,
+                        seconds, n / seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Five card draw equity against a random opponent.')
+    parser.add_argument('cards', nargs=5, help='e.g. AS 10H 3D ...')
+    parser.add_argument('--hold', type=int, nargs='*', default=range(5),
+                        help='indices of the cards to keep (default: all)')
+    parser.add_argument('--trials', type=int, default=100000)
+    parser.add_argument('--half-width', type=float, default=0.005)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--exact', action='store_true',
+                        help='enumerate every outcome instead of sampling')
+    args = parser.parse_args()
+
+    hand = [Card(c.upper()) for c in args.cards]
+    if args.exact:
+        result = exact_equity(hand, args.hold, processes=args.processes)
+    else:
+        result = equity(hand, args.hold, trials=args.trials,
+                        half_width=args.half_width, seed=args.seed,
+                        processes=args.processes)
+    print('equity %.4f +/- %.4f (%d trials, %.0f trials/sec)' % (
+        result.equity, result.half_width, result.trials,
+        result.trials_per_sec))
+
+
+if __name__ == '__main__':
+    main()
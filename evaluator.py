@@ -0,0 +1,271 @@
+#Table driven poker hand evaluator.
+#
+#Cards are passed around as small integer codes:
+#
+#    code = suit * 13 + rank
+#
+#where suit and rank are indices into the suits ('S', 'H', 'D', 'C') and
+#ranks ('A', 'K', ..., '2') lists in cards.py, so 0 is the ace of
+#spades and 51 the two of clubs.  That is also the order Deck() builds its
+#cards in.
+#
+#evaluate() returns the strength of a hand as a single integer between 1
+#and 7462 (one value per distinct 5-card equivalence class).  A higher
+#strength is a better hand and equal strengths are a tie.  The tables are
+#built once at import time:
+#
+#    _FLUSH     13-bit rank mask -> strength, for five suited cards
+#    _UNIQUE    13-bit rank mask -> strength, for five distinct ranks
+#               (straights and high card), 0 everywhere else
+#    _PRODUCTS  product of the rank primes -> strength, for hands with a
+#               repeated rank (the product is unique per rank multiset)
+#
+#Six and seven card hands are scored as their best five cards, without
+#looking at the 5-card subsets.  With at most seven cards a hand holding five
+#of one suit can't also make a full house or four of a kind, so:
+#
+#    _FLUSH_BEST     rank mask of the flush suit (5-7 bits) -> strength of
+#                    the best straight flush or flush in it
+#    _PRODUCTS_BEST  product of the 6 or 7 rank primes -> strength of the
+#                    best hand of those ranks
+#
+#Both are built on first use.  Each 6 and 7 rank multiset takes the best
+#value of the multisets one card smaller, so every entry costs a handful of
+#lookups into the level below it.
+#
+#Note: the games have never counted A-2-3-4-5 as a straight, and the tables
+#keep that rule.
+
+from itertools import combinations, combinations_with_replacement
+
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+CATEGORY_NAMES = ['high card', 'one pair', 'two pair', 'three of a kind',
+                  'straight', 'flush', 'full house', 'four of a kind',
+                  'straight flush']
+
+HAND_COUNT = 7462
+
+#Rank values used inside the tables: 0 is a deuce, 12 an ace.
+_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
+#Category of a rank multiset with repeats, keyed on its sorted counts.
+_REPEAT_CATEGORY = {
+    (4, 1): FOUR_OF_A_KIND,
+    (3, 2): FULL_HOUSE,
+    (3, 1, 1): THREE_OF_A_KIND,
+    (2, 2, 1): TWO_PAIR,
+    (2, 1, 1, 1): ONE_PAIR,
+}
+
+#Per card code lookups.
+_SUIT = [code // 13 for code in range(52)]
+_VALUE = [12 - code % 13 for code in range(52)]
+_BIT = [1 << v for v in _VALUE]
+_PRIME = [_PRIMES[v] for v in _VALUE]
+#Suit counters, one nibble per suit starting at 3 so that the 0x8 bit of a
+#nibble is set once a suit has five cards.
+_SUIT_ADD = [1 << (4 * s) for s in _SUIT]
+_SUIT_START = 0x3333
+_FLUSH_SUIT = {0x8: 0, 0x80: 1, 0x800: 2, 0x8000: 3}
+
+
+def _build_tables():
+    #Every 5-card equivalence class gets a sort key matching the way
+    #PokerHand compares hands (category, then the hand cards, then the
+    #kickers); the classes are then numbered in key order.
+    classes = []
+    for combo in combinations(range(13), 5):
+        values = combo[::-1]
+        mask = sum(1 << v for v in values)
+        if values[0] - values[4] == 4:
+            classes.append(((STRAIGHT_FLUSH, values), 'flush', mask))
+            classes.append(((STRAIGHT, values), 'unique', mask))
+        else:
+            classes.append(((FLUSH, values), 'flush', mask))
+            classes.append(((HIGH_CARD, values), 'unique', mask))
+    for combo in combinations_with_replacement(range(13), 5):
+        counts = {}
+        for v in combo:
+            counts[v] = counts.get(v, 0) + 1
+        if len(counts) == 5 or max(counts.values()) == 5:
+            continue
+        groups = sorted(counts.items(), key=lambda g: (g[1], g[0]),
+                        reverse=True)
+        category = _REPEAT_CATEGORY[tuple(n for v, n in groups)]
+        values = tuple(v for v, n in groups for i in range(n))
+        product = 1
+        for v in combo:
+            product *= _PRIMES[v]
+        classes.append(((category, values), 'product', product))
+    classes.sort()
+
+    flush = [0] * 8192
+    unique = [0] * 8192
+    products = {}
+    categories = [None]
+    class_ranks = [None]
+    for strength, (key, kind, index) in enumerate(classes, 1):
+        if kind == 'flush':
+            flush[index] = strength
+        elif kind == 'unique':
+            unique[index] = strength
+        else:
+            products[index] = strength
+        categories.append(key[0])
+        class_ranks.append(tuple(12 - v for v in key[1]))
+    return flush, unique, products, categories, class_ranks
+
+
+def _build_best_tables():
+    global _FLUSH_BEST, _PRODUCTS_BEST
+
+    flush_best = {}
+    for n in (6, 7):
+        for combo in combinations(range(13), n):
+            mask = sum(1 << v for v in combo)
+            flush_best[mask] = max(_FLUSH[sum(1 << v for v in five)]
+                                   for five in combinations(combo, 5))
+    for mask, strength in enumerate(_FLUSH):
+        if strength:
+            flush_best[mask] = strength
+
+    products_best = {}
+    smaller = {}
+    for combo in combinations_with_replacement(range(13), 5):
+        if combo[0] == combo[4]:
+            continue
+        product = 1
+        mask = 0
+        for v in combo:
+            product *= _PRIMES[v]
+            mask |= 1 << v
+        smaller[product] = _UNIQUE[mask] or _PRODUCTS[product]
+    for n in (6, 7):
+        level = {}
+        for combo in combinations_with_replacement(range(13), n):
+            if any(combo[i] == combo[i + 4] for i in range(n - 4)):
+                continue
+            product = 1
+            for v in combo:
+                product *= _PRIMES[v]
+            level[product] = max(smaller[product // _PRIMES[v]]
+                                 for v in set(combo))
+        products_best.update(level)
+        smaller = level
+
+    _FLUSH_BEST = flush_best
+    _PRODUCTS_BEST = products_best
+
+
+_FLUSH, _UNIQUE, _PRODUCTS, _CATEGORY, _CLASS_RANKS = _build_tables()
+_FLUSH_BEST = None
+_PRODUCTS_BEST = None
+
+
+def evaluate5(a, b, c, d, e):
+    #Strength of the five cards with the given codes.
+
+    if _SUIT[a] == _SUIT[b] == _SUIT[c] == _SUIT[d] == _SUIT[e]:
+        return _FLUSH[_BIT[a] | _BIT[b] | _BIT[c] | _BIT[d] | _BIT[e]]
+    strength = _UNIQUE[_BIT[a] | _BIT[b] | _BIT[c] | _BIT[d] | _BIT[e]]
+    if strength:
+        return strength
+    return _PRODUCTS[_PRIME[a] * _PRIME[b] * _PRIME[c] * _PRIME[d] * _PRIME[e]]
+
+
+def evaluate7(a, b, c, d, e, f, g):
+    #Strength of the best five of the seven cards with the given codes.
+
+    if _PRODUCTS_BEST is None:
+        _build_best_tables()
+    suits = (_SUIT_START + _SUIT_ADD[a] + _SUIT_ADD[b] + _SUIT_ADD[c] +
+             _SUIT_ADD[d] + _SUIT_ADD[e] + _SUIT_ADD[f] + _SUIT_ADD[g])
+    if suits & 0x8888:
+        suit = _FLUSH_SUIT[suits & 0x8888]
+        mask = 0
+        for code in (a, b, c, d, e, f, g):
+            if _SUIT[code] == suit:
+                mask |= _BIT[code]
+        return _FLUSH_BEST[mask]
+    return _PRODUCTS_BEST[_PRIME[a] * _PRIME[b] * _PRIME[c] * _PRIME[d] *
+                          _PRIME[e] * _PRIME[f] * _PRIME[g]]
+
+
+def _evaluate_n(codes):
+    #Strength of the best five of six or seven cards.
+
+    if _PRODUCTS_BEST is None:
+        _build_best_tables()
+    suits = _SUIT_START
+    product = 1
+    for code in codes:
+        suits += _SUIT_ADD[code]
+        product *= _PRIME[code]
+    if suits & 0x8888:
+        suit = _FLUSH_SUIT[suits & 0x8888]
+        mask = 0
+        for code in codes:
+            if _SUIT[code] == suit:
+                mask |= _BIT[code]
+        return _FLUSH_BEST[mask]
+    return _PRODUCTS_BEST[product]
+
+
+def evaluate(codes):
+    #Strength of a hand given as a sequence of 5, 6 or 7 card codes.  For
+    #more than five cards this is the strength of the best five.
+
+    n = len(codes)
+    if n == 5:
+        return evaluate5(*codes)
+    if n == 7:
+        return evaluate7(*codes)
+    if n == 6:
+        return _evaluate_n(codes)
+    raise ValueError('evaluate(): expected 5 to 7 cards, got %d' % n)
+
+
+def category(strength):
+    #Hand category (HIGH_CARD ... STRAIGHT_FLUSH) of a strength value.
+
+    return _CATEGORY[strength]
+
+
+def class_ranks(strength):
+    #Rank indices (0 is an ace) of the five cards making up a strength,
+    #hand cards first, then kickers.
+
+    return _CLASS_RANKS[strength]
+
+
+def flush_suit(codes):
+    #Suit index holding five or more of the cards, or None.
+
+    suits = _SUIT_START
+    for code in codes:
+        suits += _SUIT_ADD[code]
+    return _FLUSH_SUIT.get(suits & 0x8888)
+
+
+def tables():
+    #The lookup tables, for code that evaluates hands in bulk (batch.py).
+
+    if _PRODUCTS_BEST is None:
+        _build_best_tables()
+    return {
+        'flush': _FLUSH,
+        'unique': _UNIQUE,
+        'products': _PRODUCTS,
+        'flush_best': _FLUSH_BEST,
+        'products_best': _PRODUCTS_BEST,
+        'category': _CATEGORY,
+    }
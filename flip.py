@@ -1,15 +1,158 @@
+#Heads or tails.
+#
+#Run without arguments it is the game: guess, and the coin says whether you
+#won.  With --flips it simulates a player instead:
+#
+#    python flip.py --flips 1000000000 --processes 4
+#
+#A guess made without seeing a fair coin wins with probability 1/2 whatever
+#it is, so a simulated flip is one random bit, 1 for a win.  Bits come from
+#NumPy in chunks of CHUNK_FLIPS (random bytes unpacked eight flips to a
+#byte) and each chunk is folded into running totals: wins, the longest
+#winning and losing streaks and a histogram of run lengths (a run is a
+#streak of equal outcomes; runs of MAX_RUN or more share the last bucket).
+#The run still going at the end of a chunk is carried into the next, so
+#memory stays constant however many flips are made.
+#
+#The flips are split over --streams independent streams, each seeded from
+#its own child of numpy.random.SeedSequence(seed), and the streams run on a
+#process pool.  Every stream is a separate player, so the totals are
+#reproducible for a seed and a number of streams whatever the number of
+#processes.
+
+import argparse
+import multiprocessing
 import random
+import time
 
 coin = ["heads", "tails"]
 
+CHUNK_FLIPS = 1 << 22
+MAX_RUN = 64
+STREAMS = 8
+
+
 def flip():
-	ui = raw_input("Heads or Tails? ").lower()
-	side = random.choice(coin)
+    ui = input("Heads or Tails? ").lower()
+    side = random.choice(coin)
+
+    if ui == side:
+        print("You Win!")
+    else:
+        print("You Lose!")
+
+
+def _new_stats():
+    import numpy as np
+    return {'flips': 0, 'wins': 0, 'longest_win': 0, 'longest_loss': 0,
+            'runs': np.zeros(MAX_RUN + 1, dtype=np.int64)}
+
+
+def _count_run(stats, value, length):
+    stats['runs'][min(length, MAX_RUN)] += 1
+    key = 'longest_win' if value else 'longest_loss'
+    if length > stats[key]:
+        stats[key] = length
+
+
+def _simulate_stream(args):
+    #Totals over flips simulated flips from one seed sequence.
+    import numpy as np
+
+    flips, seed = args
+    rng = np.random.Generator(np.random.PCG64(seed))
+    stats = _new_stats()
+    runs = stats['runs']
+    carry_value = carry_length = None
+    left = flips
+    while left > 0:
+        n = min(CHUNK_FLIPS, left)
+        bits = np.unpackbits(np.frombuffer(rng.bytes((n + 7) // 8),
+                                           dtype=np.uint8))[:n]
+        left -= n
+        stats['flips'] += n
+        stats['wins'] += int(np.count_nonzero(bits))
+
+        starts = np.flatnonzero(bits[1:] != bits[:-1]) + 1
+        starts = np.concatenate(([0], starts))
+        lengths = np.diff(np.append(starts, n))
+        values = bits[starts]
+        if carry_length is not None:
+            if values[0] == carry_value:
+                lengths[0] += carry_length
+            else:
+                _count_run(stats, carry_value, carry_length)
+        # the last run may go on in the next chunk
+        carry_value = int(values[-1])
+        carry_length = int(lengths[-1])
+        lengths = lengths[:-1]
+        values = values[:-1]
+        if len(lengths):
+            runs += np.bincount(np.minimum(lengths, MAX_RUN),
+                                minlength=MAX_RUN + 1)
+            for value, key in ((1, 'longest_win'), (0, 'longest_loss')):
+                mine = lengths[values == value]
+                if len(mine):
+                    stats[key] = max(stats[key], int(mine.max()))
+    if carry_length is not None:
+        _count_run(stats, carry_value, carry_length)
+    return stats
+
+
+def simulate(flips, seed=0, streams=STREAMS, processes=None):
+    #Totals over flips simulated flips split across streams: flips, wins,
+    #win_rate, longest_win, longest_loss, runs (run length histogram as a
+    #list), seconds and flips_per_sec.
+    import numpy as np
+
+    start = time.time()
+    seeds = np.random.SeedSequence(seed).spawn(streams)
+    jobs = [(flips // streams + (i < flips % streams), seeds[i])
+            for i in range(streams)]
+    totals = _new_stats()
+    pool = multiprocessing.Pool(processes)
+    try:
+        for stats in pool.imap(_simulate_stream, jobs):
+            totals['flips'] += stats['flips']
+            totals['wins'] += stats['wins']
+            totals['runs'] += stats['runs']
+            totals['longest_win'] = max(totals['longest_win'],
+                                        stats['longest_win'])
+            totals['longest_loss'] = max(totals['longest_loss'],
+                                         stats['longest_loss'])
+    finally:
+        pool.terminate()
+        pool.join()
+    totals['runs'] = totals['runs'].tolist()
+    totals['win_rate'] = totals['wins'] / max(totals['flips'], 1)
+    totals['seconds'] = time.time() - start
+    totals['flips_per_sec'] = totals['flips'] / totals['seconds']
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Heads or tails.')
+    parser.add_argument('--flips', type=int, default=None,
+                        help='simulate this many flips instead of playing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--streams', type=int, default=STREAMS)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
 
-	if ui == side:
-		print "You Win!"
-	else:
-		print "You Lose!"
+    if args.flips is None:
+        flip()
+        return
+    stats = simulate(args.flips, args.seed, args.streams, args.processes)
+    print('%(flips)d flips, win rate %(win_rate).6f, longest winning streak '
+          '%(longest_win)d, longest losing streak %(longest_loss)d' % stats)
+    print('run lengths:')
+    for length, count in enumerate(stats['runs']):
+        if count:
+            print('  %s%-3d %d' % ('>=' if length == MAX_RUN else '  ',
+                                   length, count))
+    print('%.1f s, %.0f flips/sec' % (stats['seconds'],
+                                     stats['flips_per_sec']))
 
 
-flip()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -3,675 +3,279 @@
 # http://www.github.com/aceancer #
 ##################################
 
-import random
+import logging
+import os
 import time
 import string
-import logging
-from collections import OrderedDict
-import tkinter as tk
-import tkinter.simpledialog as tksd
-
-suits = ['S', 'H', 'D', 'C']
-ranks = ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2']
+from collections import OrderedDict, deque
 
-POS_TOP = 0
-POS_BOTTOM = 1
+from cards import suits, ranks, POS_TOP, POS_BOTTOM, f_list, Card, Deck, PokerHand
+from engine import GameState, BET, CHECK, DRAW, CONTINUE, DISCARD, OVER
+from drawtable import optimal_draw
+import history
+import wordlist
 
 logger = logging.getLogger(__name__)
 
-
-def f_list(lst, sep=','):
-    return sep.join([str(x) for x in lst])
-
-
-def f_lists(lst, sep=' / '):
-    return f_list(map(f_list, lst), sep)
-
-
-class Card(object):
-    def __init__(self, rank, suit=None):
-        if suit is None:
-            suit = rank[1]
-            rank = rank[0]
-        if rank not in ranks:
-            raise ValueError('Card(): Invalid rank')
-        if suit not in suits:
-            raise ValueError('Card(): Invalid suit')
-        self.rank = rank
-        self.suit = suit
-
-    @classmethod
-    def card_list(cls, *args):
-        lst = []
-        for c in args:
-            lst.append(cls(c))
-            return lst
-
-    def __str__(self):
-        return self.rank + self.suit
-
-    def __repr__(self):
-        return '%s%s' % (self.rank, self.suit)
-
-    def __hash__(self):
-        return (ord(self.rank) << 8) + ord(self.suit)
-
-    def __eq__(self, obj):
-        return self.rank == obj.rank and self.suit == obj.suit
-
-    def __ne__(self, obj):
-        return self.rank != obj.rank or self.suit != obj.suit
-
-    def __lt__(self, obj):
-        return ranks.index(self.rank) > ranks.index(obj.rank)
-
-    def __gt__(self, obj):
-        return ranks.index(self.rank) < ranks.index(obj.rank)
-
-    def __le__(self, obj):
-        return ranks.index(self.rank) >= ranks.index(obj.rank)
-
-    def __ge__(self, obj):
-        return ranks.index(self.rank) <= ranks.index(obj.rank)
-
-
-class Deck(object):
-    def __init__(self):
-        self.popped = []
-        self.discarded = []
-        self.active = []
-        for s in suits:
-            for r in ranks:
-                self.active.append(Card(r, s))
-
-    def shuffle(self):
-        #Shuffle the deck.
-
-        random.shuffle(self.active)
-
-    def pop(self):
-        #Deal the top card from the deck.
-
-        card = self.active.pop()
-        self.popped.append(card)
-        return card
-
-    def discard(self):
-        card = self.active.pop()
-        self.discarded.append(card)
-
-    def return_cards(self, cards, pos=POS_BOTTOM):
-        if pos not in (POS_BOTTOM, POS_TOP):
-            raise Exception('Deck.return_cards(): invalid pos parameter')
-
-        for card in cards[:]:
-            if card in self.discarded:
-                self.discarded.remove(card)
-            elif card in self.popped:
-                self.popped.remove(card)
-            else:
-                raise Exception('Deck.return_cards(): card not among removed cards')
-
-        if pos == POS_BOTTOM:
-            self.active[0:0] = [card]
-        else:
-            self.active.append(card)
-
-    def return_discarded(self, pos=POS_BOTTOM):
-        self.return_cards(self.discarded, pos)
-
-    def return_popped(self, pos=POS_BOTTOM):
-        self.return_cards(self.popped, pos)
-
-    def return_all(self, pos=POS_BOTTOM):
-        self.return_popped()
-        self.return_discarded()
-
-    def stats(self):
-        return (len(self.active), len(self.popped), len(self.discarded))
-
-    def __str__(self):
-        return '[%s]' % ' '.join((str(card) for card in self.active))
-
-    def __repr__(self):
-        return 'Card(%s)' % self.__str__()
-
-
-class PokerHand(object):
-    #Compute the best hand from given cards, implementing traditional
-    #high" poker hand ranks.
-
-    def __init__(self, cards, evaluate=True):
-        cards.sort(reverse=True)
-        self.cards = cards
-        if evaluate:
-            self.evaluate()
-
-    def evaluate(self):
-        #Evaluate the rank of the hand.
-        
-        self._eval_hand_rank()
-        self._fill_kickers()
-
-    def _by_rank(self, cards=None):  #Order cards
-        if cards is None:
-            cards = self.cards
-        ranked = OrderedDict()
-        for card in cards:
-            if card.rank in ranked:
-                ranked[card.rank].append(card)
-            else:
-                ranked[card.rank] = [card]
-        return ranked
-
-    def _by_suit(self, cards=None):
-        if cards is None:
-            cards = self.cards
-        suited = OrderedDict()
-        for card in cards:
-            if card.suit in suited:
-                suited[card.suit].append(card)
-            else:
-                suited[card.suit] = [card]
-        return suited
-
-    def _find_flushes(self, cards=None):  # flushes
-        if cards is None:
-            cards = self.cards
-        flushes = []
-        for cards in self._by_suit(cards).values():
-            l = len(cards)
-            if l >= 5:
-                for i in range(0, l - 4):
-                    flushes.append(cards[i:i + 5])
-        return flushes
-
-    def _find_straights(self, cards=None):  # starights
-        if cards is None:
-            cards = self.cards
-        straights = []
-        for i in range(0, len(cards) - 4):
-            card_ranks = [c.rank for c in cards[i:i + 5]]
-            j = ranks.index(card_ranks[0])
-            if card_ranks == ranks[j:j + 5]:
-                straights.append(cards[i:i + 5])
-        return straights
-
-    def _fill_kickers(self):  # If hands are tied find winner
-        hand_count = len(self.hand_cards)
-        kicker_count = 5 - hand_count
-        if kicker_count > 0:
-            kickers = self.cards[:]
-            for card in self.hand_cards:
-                kickers.remove(card)
-            self.kickers = kickers[:kicker_count]
-        else:
-            self.kickers = []
-        logger.debug("kickers: %s", f_list(self.kickers))
-        logger.debug("--- -------------- ---")
-
-    def _eval_hand_rank(self):
-        logger.debug("--- Evaluating %s ---", f_list(self.cards))
-        straights = self._find_straights()
-        if straights: logger.debug("straights: %s", f_lists(straights))
-        flushes = self._find_flushes()
-        if flushes: logger.debug("flushes: %s", f_lists(flushes))
-        pairs = []
-        threes = []
-        fours = []
-        for cards in self._by_rank().values():
-            l = len(cards)
-            if l >= 4:
-                fours.append(cards[0:4])
-            elif l == 3:
-                threes.append(cards)
-            elif l == 2:
-                pairs.append(cards)
-        if pairs: logger.debug("pairs: %s", f_lists(pairs))
-        if threes: logger.debug("threes: %s", f_lists(threes))
-        if fours: logger.debug("fours: %s", f_lists(fours))
-        # straight flush
-        for cards in straights:
-            if cards in flushes:
-                self.hand_rank = 8
-                self.hand_cards = cards
-                logger.debug("* straight flush: %s", f_list(self.hand_cards))
-                return
-        # four of a kind
-        if len(fours) > 0:
-            self.hand_rank = 7
-            self.hand_cards = fours[0]
-            logger.debug("* four of a kind: %s", f_list(self.hand_cards))
-            return
-        # full house
-        if len(threes) > 1:
-            self.hand_rank = 6
-            self.hand_cards = threes[0] + threes[1][:2]
-            logger.debug("* full house: %s", f_list(self.hand_cards))
+HERE = os.path.dirname(os.path.abspath(__file__))
+CARDS_DIR = os.path.join(HERE, 'cards_gif')
+#Every poker hand played is appended here (see history.py).
+HISTORY_PATH = os.path.join(HERE, 'history.bin')
+#Decoded, half size card faces, keyed by str(card).  Every screen draws from
+#here, so each GIF is read from disk once per run however often the table is
+#redrawn; the bound keeps all 52 faces.
+CARD_IMAGE_CACHE_SIZE = 52
+_card_images = OrderedDict()
+
+
+def card_image(card):
+    key = str(card)
+    photo = _card_images.get(key)
+    if photo is not None:
+        _card_images.move_to_end(key)
+        return photo
+    photo = tk.PhotoImage(file=os.path.join(CARDS_DIR, key + '.gif'))
+    photo = photo.subsample(2, 2)
+    _card_images[key] = photo
+    if len(_card_images) > CARD_IMAGE_CACHE_SIZE:
+        _card_images.popitem(last=False)
+    return photo
+
+
+#How long a message stays up before the game moves on, and the frame time
+#the UI's own work is measured against.
+MESSAGE_MS = 1000
+FRAME_MS = 1000.0 / 60
+LATENCY_SAMPLES = 1000
+
+
+class Scheduler(object):
+    #Timed transitions on the Tk event loop.  after(ms, callback) queues
+    #callback to run ms milliseconds after the transitions queued before it
+    #have run; in between the window keeps handling events.
+    #
+    #For every callback it records how late it started (behind its due
+    #time) and how long it ran; wrap() records the run time of event
+    #handlers such as button commands the same way.  stats() summarizes
+    #the last LATENCY_SAMPLES of each; close() logs them at INFO level.
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._queue = deque()
+        self._pending = None
+        self.lateness = deque(maxlen=LATENCY_SAMPLES)
+        self.busy = deque(maxlen=LATENCY_SAMPLES)
+
+    def after(self, ms, callback):
+        self._queue.append((ms, callback))
+        if self._pending is None:
+            self._next()
+
+    def _next(self):
+        if not self._queue:
+            self._pending = None
             return
-        elif len(threes) == 1 and len(pairs) > 0:
-            self.hand_rank = 6
-            self.hand_cards = threes[0] + pairs[0]
-            logger.debug("* full house: %s", f_list(self.hand_cards))
-            return
-        # flush
-        if len(flushes) > 0:
-            self.hand_rank = 5
-            self.hand_cards = flushes[0]
-            logger.debug("* flush: %s", f_list(self.hand_cards))
-            return
-        # straight
-        if len(straights) > 0:
-            self.hand_rank = 4
-            self.hand_cards = straights[0]
-            logger.debug("* straight: %s", f_list(self.hand_cards))
-            return
-        # three of a kind
-        if len(threes) > 0:
-            self.hand_rank = 3
-            self.hand_cards = threes[0]
-            logger.debug("* three of a kind: %s", f_list(self.hand_cards))
-            return
-        # two pair
-        if len(pairs) > 1:
-            self.hand_rank = 2
-            self.hand_cards = pairs[0] + pairs[1]
-            logger.debug("* two pairs: %s", f_list(self.hand_cards))
-            return
-        # one pair
-        if len(pairs) == 1:
-            self.hand_rank = 1
-            self.hand_cards = pairs[0];
-            logger.debug("* two of a kind: %s", f_list(self.hand_cards))
-            return
-        # high card
-        self.hand_rank = 0
-        self.hand_cards = [self.cards[0]]
-        logger.debug("* high card: %s", f_list(self.hand_cards))
-
-    def __str__(self):
-        return '[%s]' % f_list(self.cards)
-
-    def __repr__(self):
-        return '%s(%s)' % (self.__class__.__name__, self.__str__())
-
-    def __cmp__(self, other):
-        if self.hand_rank > other.hand_rank:
-            return 1
-        elif self.hand_rank < other.hand_rank:
-            return -1
-        else:
-            # same rank
-            for c1, c2 in zip(self.hand_cards, other.hand_cards):
-                if c1 > c2:
-                    return 1
-                elif c1 < c2:
-                    return -1
-            else:
-                # same cards, check kickers
-                for c1, c2 in zip(self.kickers, other.kickers):
-                    if c1 > c2:
-                        return 1
-                    elif c1 < c2:
-                        return -1
-                # really, a tie
-                return 0
-
+        ms, callback = self._queue.popleft()
+        due = time.perf_counter() + ms / 1000.0
+        self._pending = self.widget.after(
+            ms, lambda: self._run(due, callback))
+
+    def _run(self, due, callback):
+        self.lateness.append((time.perf_counter() - due) * 1000)
+        # the timer has fired; a callback that queues or cancels work
+        # starts the next one itself
+        self._pending = None
+        try:
+            self._timed(callback)
+        finally:
+            # a failing callback must not stall the ones queued after it
+            if self._pending is None:
+                self._next()
+
+    def _timed(self, callback, *args):
+        start = time.perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            self.busy.append((time.perf_counter() - start) * 1000)
+
+    def wrap(self, callback):
+        return lambda *args: self._timed(callback, *args)
+
+    def cancel(self):
+        # drop everything queued, e.g. when the screen is torn down
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self._queue.clear()
 
-#cmoney = 0
-#money = 0
-#maxb = 0
-#pot = 0
+    def stats(self):
+        #Worst and mean milliseconds of each, and how many runs took longer
+        #than a frame.
+        stats = {}
+        for name, samples in (('lateness', self.lateness),
+                              ('busy', self.busy)):
+            samples = list(samples)
+            stats[name + '_max_ms'] = max(samples) if samples else 0.0
+            stats[name + '_mean_ms'] = (sum(samples) / len(samples)
+                                        if samples else 0.0)
+        stats['over_frame'] = sum(1 for ms in self.busy if ms > FRAME_MS)
+        return stats
 
 
 def fiveCardPoker():
     clear()
     window.title("5 Card Draw")
 
-    global cmoney
-    global money
-    global maxb
-    global pot
-    global bet
-    global bet2
-    global check
-    global check2
-    global calc
-    global response
-
-    cmoney = 500
-    money = 500
-    maxb = 500
-    pot = 0
-
-    response = 0
-
-    deck = Deck()
-    deck.shuffle()
-    
-    def cardpicture():
-        global player
-        global photop
-        global photop2
-        global photop3
-        global photop4
-        global photop5
-
-        frame = tk.Frame()
-        frame.pack(side=tk.TOP)
-        photo = tk.PhotoImage(file=("cards_gif/" + str(player[0]) + ".gif"))
-        photo = photo.subsample(2, 2)
-        photop = tk.Label(frame, image=photo)
-        photop.photo = photo
-        photop.pack(side=tk.LEFT)
-        photo2 = tk.PhotoImage(file=("cards_gif/" + str(player[1]) + ".gif"))
-        photo2 = photo2.subsample(2, 2)
-        photop2 = tk.Label(frame, image=photo2)
-        photop2.photo = photo2
-        photop2.pack(side=tk.LEFT)
-        photo3 = tk.PhotoImage(file=("cards_gif/" + str(player[2]) + ".gif"))
-        photo3 = photo3.subsample(2, 2)
-        photop3 = tk.Label(frame, image=photo3)
-        photop3.photo = photo3
-        photop3.pack(side=tk.LEFT)
-        photo4 = tk.PhotoImage(file=("cards_gif/" + str(player[3]) + ".gif"))
-        photo4 = photo4.subsample(2, 2)
-        photop4 = tk.Label(frame, image=photo4)
-        photop4.photo = photo4
-        photop4.pack(side=tk.LEFT)
-        photo5 = tk.PhotoImage(file=("cards_gif/" + str(player[4]) + ".gif"))
-        photo5 = photo5.subsample(2, 2)
-        photop5 = tk.Label(frame, image=photo5)
-        photop5.photo = photo5
-        photop5.pack(side=tk.LEFT)
-        window.update()
-
-    def discard():
-        clear()
-        text = tk.Label(text="Select Cards to Discard")
-        text.pack()
-
-        global var1
-        global var2
-        global var3
-        global var4
-        global var5
-
-        global photop
-        global photop2
-        global photop3
-        global photop4
-        global photop5
-
-        frame = tk.Frame()
-        frame.pack(side=tk.TOP)
-
-        var1 = tk.IntVar()
-        var2 = tk.IntVar()
-        var3 = tk.IntVar()
-        var4 = tk.IntVar()
-        var5 = tk.IntVar()
-        box1 = tk.Checkbutton(frame, image=photop.photo, variable=var1)
-        box2 = tk.Checkbutton(frame, image=photop2.photo, variable=var2)
-        box3 = tk.Checkbutton(frame, image=photop3.photo, variable=var3)
-        box4 = tk.Checkbutton(frame, image=photop4.photo, variable=var4)
-        box5 = tk.Checkbutton(frame, image=photop5.photo, variable=var5)
-        box1.pack(side=tk.LEFT)
-        box2.pack(side=tk.LEFT)
-        box3.pack(side=tk.LEFT)
-        box4.pack(side=tk.LEFT)
-        box5.pack(side=tk.LEFT)
-
-        submit = tk.Button(text="Submit", width=20, command=sub)
-        submit.pack()
-
-        window.update()
+    recorder = hand_history()
+    game = GameState(computer_draw=optimal_draw,
+                     recorder=recorder.write if recorder else None)
+
+    # The widgets are made once and updated in place; show() swaps which of
+    # them are packed.  Pauses go through the scheduler, never time.sleep,
+    # so the window keeps repainting and taking input.
+    shown = []
+    note = tk.Label()
+    heading = tk.Label()
+    hand = tk.Frame()
+    faces = [tk.Label(hand) for i in range(5)]
+    variables = [tk.IntVar() for i in range(5)]
+    boxes = [tk.Checkbutton(hand, variable=var) for var in variables]
+    y_money = tk.Label()
+    tc_money = tk.Label()
+    p_pot = tk.Label()
+    result = tk.Label()
+
+    def show(*widgets):
+        for widget in shown:
+            widget.pack_forget()
+        del shown[:]
+        for widget in widgets:
+            widget.pack()
+            shown.append(widget)
+
+    def cardpicture(discarding=False):
+        for face, box, card in zip(faces, boxes, game.player):
+            photo = card_image(card)
+            face.config(image=photo)
+            box.config(image=photo)
+            if discarding:
+                face.pack_forget()
+                box.pack(side=tk.LEFT)
+            else:
+                box.pack_forget()
+                face.pack(side=tk.LEFT)
 
-    def sub():
-        global money
-        global cmoney
-        global pot
-        
-        clear()
-        i = 0
-
-        if var1.get() == 1:
-            player[0] = deck.pop()
-            i += 1
-        if var2.get() == 1:
-            player[1] = deck.pop()
-            i += 1
-        if var3.get() == 1:
-            player[2] = deck.pop()
-            i += 1
-        if var4.get() == 1:
-            player[3] = deck.pop()
-            i += 1
-        if var5.get() == 1:
-            player[4] = deck.pop()
-            i += 1
-
-        if i == 0:
-            i = tk.Label(text=("You didn't discard any cards."))
-            i.pack()
-        elif i == 1:
-            i = tk.Label(text=("You discarded 1 card."))
-            i.pack()
-        else:
-            i = tk.Label(text=("You discarded " + str(i) + " cards."))
-            i.pack()
+    def message(text, then):
+        note.config(text=text)
+        show(note)
+        scheduler.after(MESSAGE_MS, then)
 
-        window.update()
-        time.sleep(1)
-        clear()
-        
-        betd = 0
-
-        t_hand = tk.Label(text=("Your Hand:"))
-        y_money = tk.Label(text=("Your Money: $" + str(money)))
-        tc_money = tk.Label(text=("Computer\'s Money: $" + str(cmoney)))
-        p_pot = tk.Label(text=("Pot: $" + str(pot)))
-        checkd = tk.Button(text="Check", width=20, command=check2)
-        t_hand.pack()
+    def table(money=True):
+        heading.config(text="Your Hand:")
         cardpicture()
-        y_money.pack()
-        tc_money.pack()
-        p_pot.pack()
-        if money > 0 and cmoney > 0:
-            betd = tk.Button(text="Bet", width=20, command=bet2)
-            betd.pack()
-        checkd.pack()
-    
-    def calc():
-        global money
-        global cmoney
-        global pot
-        global player
-        global computer
-        global response
-		
-        if cmoney > money:
-            maxb = money
+        if not money:
+            return [heading, hand]
+        y_money.config(text=("Your Money: $" + str(game.money)))
+        tc_money.config(text=("Computer\'s Money: $" + str(game.cmoney)))
+        p_pot.config(text=("Pot: $" + str(game.pot)))
+        return [heading, hand, y_money, tc_money, p_pot]
+
+    def betting():
+        # the hand and a Bet / Check choice
+        widgets = table()
+        if BET in game.legal_actions():
+            widgets.append(betd)
+        widgets.append(checkd)
+        show(*widgets)
+
+    def proceed(money=True):
+        # after a betting round: on to the discards or the showdown
+        if game.phase == DISCARD:
+            cont.config(command=scheduler.wrap(discard))
         else:
-            maxb = cmoney
-
-        response = tksd.askinteger("Bet", "How Much?\nMax Bet: " + str(maxb), minvalue=1, maxvalue=maxb)
-        money -= response
-        cmoney -= response
-        pot += response * 2
-        pot = int(pot)
-        money = int(money)
-        cmoney = int(cmoney)
-        clear()
-        doc = tk.Label(text="The computer matched your bet.")
-        doc.pack()
-        window.update()
-        time.sleep(1)
-        clear()
-        t_hand = tk.Label(text="Your Hand:")
-        y_money = tk.Label(text=("Your Money: $" + str(money)))
-        tc_money = tk.Label(text=("Computer\'s Money: $" + str(cmoney)))
-        p_pot = tk.Label(text=("Pot: $" + str(pot)))
-        t_hand.pack()
-        cardpicture()
-        y_money.pack()
-        tc_money.pack()
-        p_pot.pack()
-        
+            cont.config(command=scheduler.wrap(end))
+        show(*table(money) + [cont])
 
     def bet():
-        global cmoney
-        global money
-        global calc
-        global response
-		
-        calc()
-
-        cont = tk.Button(text="Continue", width=20, command=discard)
-        cont.pack()
-        window.update()
+        maxb = game.max_bet()
+        response = tksd.askinteger("Bet", "How Much?\nMax Bet: " + str(maxb), minvalue=1, maxvalue=maxb)
+        if response is None:
+            return
+        game.step(BET, response)
+        message("The computer matched your bet.", proceed)
 
-    def bet2():
-        global cmoney
-        global money
-        global calc
-        global response
+    def check():
+        game.step(CHECK)
+        proceed(money=False)
 
-        calc()
+    def discard():
+        heading.config(text="Select Cards to Discard")
+        for var in variables:
+            var.set(0)
+        cardpicture(discarding=True)
+        show(heading, hand, submit)
 
-        cont = tk.Button(text="Continue", width=20, command=end)
-        cont.pack()
-        window.update()
+    def sub():
+        indices = [i for i, var in enumerate(variables) if var.get() == 1]
+        (event, count), = game.step(DRAW, indices)
 
-    def check():
-        clear()
-        t_hand = tk.Label(text="Your Hand:")
-        t_hand.pack()
-        cardpicture()
-        cont = tk.Button(text="Continue", width=20, command=discard)
-        cont.pack()
-        window.update()
-
-    def check2():
-        clear()
-        t_hand = tk.Label(text="Your Hand:")
-        t_hand.pack()
-        cardpicture()
-        cont = tk.Button(text="Continue", width=20, command=end)
-        cont.pack()
-        window.update()
+        if count == 0:
+            message("You didn't discard any cards.", betting)
+        elif count == 1:
+            message("You discarded 1 card.", betting)
+        else:
+            message("You discarded " + str(count) + " cards.", betting)
 
     def end():
-        global cmoney
-        global money
-        global pot
-
-        pval = PokerHand(player, True)
-        cval = PokerHand(computer, True)
+        events = game.step(CONTINUE)
+        if recorder:
+            recorder.flush()
 
-        clear()
         '''Choose round winner'''
 
-        if pval > cval:
-            win = tk.Label(text="You won the round!")
-            win.pack()
-            window.update()
-            money += pot
-            pot = 0
+        if events[0][0] == 'won':
+            message("You won the round!", settle)
         else:
-            loss = tk.Label(text="You lost the round.")
-            loss.pack()
-            window.update()
-            cmoney += pot
-            pot = 0
-
-        time.sleep(1)
-        clear()
-
-        if cmoney == 1000:
-            loss2 = tk.Label(text="YOU LOST THE GAME.")
-            cont = tk.Button(text="Play Again", width=20, command=fiveCardPoker)
-            p_quit = tk.Button(text='Quit', width=20, command=close)
-            new = tk.Button(text='Play A Different Game', width=20, command=main)
-            loss2.pack()
-            cont.pack()
-            p_quit.pack()
-            new.pack()
-            window.update()
-        elif money == 1000:
-            win2 = tk.Label(text="YOU WON THE GAME!")
-            cont = tk.Button(text="Play Again", width=20, command=fiveCardPoker)
-            p_quit = tk.Button(text='Quit', width=20, command=close)
-            new = tk.Button(text='Play A Different Game', width=20, command=main)
-            win2.pack()
-            cont.pack()
-            p_quit.pack()
-            new.pack()
-            window.update()
+            message("You lost the round.", settle)
+
+    def settle():
+        if game.phase == OVER:
+            if game.winner() == 'player':
+                result.config(text="YOU WON THE GAME!")
+            else:
+                result.config(text="YOU LOST THE GAME.")
+            show(result, again, p_quit, new)
         else:
             initiate()
 
+    # bet() is left unmeasured: it waits on the bet dialog
+    betd = tk.Button(text="Bet", width=20, command=bet)
+    checkd = tk.Button(text="Check", width=20, command=scheduler.wrap(check))
+    cont = tk.Button(text="Continue", width=20)
+    submit = tk.Button(text="Submit", width=20, command=scheduler.wrap(sub))
+    again = tk.Button(text="Play Again", width=20, command=fiveCardPoker)
+    p_quit = tk.Button(text='Quit', width=20, command=close)
+    new = tk.Button(text='Play A Different Game', width=20, command=main)
+
     '''Start Game'''
 
     def initiate():
-        clear()
-
-        global pot
-        global money
-        global cmoney
-        global bet
-        global check
-        global player
-        global computer
-
-        player = []
-        computer = []
-
-        for i in range(5):
-            card = deck.pop()
-            player.append(card)
-
-        for i in range(5):
-            card = deck.pop()
-            computer.append(card)
-
-        player.sort()
-        computer.sort()
-
-        pot += 10
-        money -= 5
-        cmoney -= 5
-
-        p_ante = tk.Label(text="All players have anted.")
-        p_ante.pack()
-        window.update()
-        time.sleep(1)
-        clear()
-        t_hand = tk.Label(text=("Your Hand:"))
-        y_money = tk.Label(text=("Your Money: $" + str(money)))
-        tc_money = tk.Label(text=("Computer\'s Money: $" + str(cmoney)))
-        p_pot = tk.Label(text=("Pot: $" + str(pot)))
-        t_hand.pack()
-        cardpicture()
-        y_money.pack()
-        tc_money.pack()
-        p_pot.pack()
-        betd = tk.Button(text="Bet", width=20, command=bet)
-        betd.pack()
-        checkd = tk.Button(text="Check", width=20, command=check)
-        checkd.pack()
-        window.update()
+        game.step(CONTINUE)
+        message("All players have anted.", betting)
 
     initiate()
 
 
-def hangman():
+def hangman(evil=False):
     alphabet = list(string.ascii_lowercase)
-    words = list(open("dic.txt", "r"))
-    word = ""
-    while len(word) < 5 or len(word) > 10:
-        word = random.choice(words).lower()
-    word = word.rstrip("\n")
+    word = wordlist.random_word(5, 10)
+    evil_word = None
+    if evil:
+        # the computer only commits to the length and dodges every guess
+        import hangsolver
+        evil_word = hangsolver.EvilWord(len(word))
+        word = evil_word.word()
     w = list(word)
     answer = list("_" * (len(word)))
     guess = ""
@@ -746,22 +350,36 @@ def hangman():
 
         letter = False
         while letter == False:
-            guess = str(input("Guess a letter or a word: "))
-            if guess not in alphabet:
+            guess = str(input("Guess a letter or a word (? for a hint): "))
+            if guess == "?":
+                import hangsolver
+                suggestion, left = hangsolver.hint(''.join(answer), guesses)
+                print("Try " + suggestion + ", " + str(left) + " words still fit.")
+            elif guess not in alphabet:
                 if guess in guesses:
                     print("You've already guessed that.")
                 elif len(guess) == 1:
                     print("That's not a letter.")
                 elif len(guess) != len(word):
                         print("That's too short.")
-                elif guess == word:
-                    letter = True
-                    answer = list(guess)
+                else:
+                    if evil_word is not None:
+                        evil_word.exclude(guess)
+                        word = evil_word.word()
+                        w = list(word)
+                    if guess == word:
+                        letter = True
+                        answer = list(guess)
             elif guess in guesses:
                 print("You have already guessed that.")
             else:
                 letter = True
 
+        if evil_word is not None and len(guess) == 1:
+            evil_word.guess(guess)
+            word = evil_word.word()
+            w = list(word)
+
         if guess in w:
             for i in range(len(word)):
                 if guess == w[i]:
@@ -778,31 +396,74 @@ def hangman():
         clear(50)
 
 play = ""
-window = tk.Tk()
+#tkinter and the window only come into being when the GUI starts, so the
+#module can be imported without a display.
+tk = None
+tksd = None
+window = None
+scheduler = None
+
+
+def start_gui():
+    global tk, tksd, window, scheduler
+    if window is None:
+        import tkinter
+        import tkinter.simpledialog
+        tk = tkinter
+        tksd = tkinter.simpledialog
+        window = tk.Tk()
+        scheduler = Scheduler(window)
 
 
 def main():
+    start_gui()
     clear()
     window.title("Games")
     window.geometry("800x600")
     text = tk.Label(text='What game would you like to play?')
     p_poker = tk.Button(text='Poker', width=20, command=fiveCardPoker)
     p_hang = tk.Button(text='Hangman', width=20, command=hangman)
+    p_evil = tk.Button(text='Evil Hangman', width=20,
+                       command=lambda: hangman(evil=True))
     p_quit = tk.Button(text='Quit', width=20, command=close)
     text.pack()
     p_poker.pack()
     p_hang.pack()
+    p_evil.pack()
     p_quit.pack()
     window.mainloop()
 
 
+#The HistoryWriter, or False once it couldn't be opened.
+_history = None
+
+
+def hand_history():
+    #The writer for HISTORY_PATH, or None if it can't be opened: recording
+    #is best effort, like wordlist's in-memory fallback, and the game is
+    #played without it.
+    global _history
+    if _history is None:
+        try:
+            _history = history.HistoryWriter(HISTORY_PATH)
+        except (OSError, ValueError) as e:
+            logger.warning('not recording hands: %s', e)
+            _history = False
+    return _history or None
+
+
 def close():
+    if _history:
+        _history.close()
+    logger.info('UI timing: %s', scheduler.stats())
     window.destroy()
 
 
 def clear():
+    scheduler.cancel()
     for widget in window.winfo_children():
         widget.destroy()
 
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#A SQLite store of played hands, for querying.
+#
+#HandStore is a sink for engine.HandResults (give its write method to a
+#GameState or play() as the recorder).  Each hand becomes a row of the hands
+#table with the categories of the player's dealt and final hands and of the
+#computer's hand, the number of cards the player drew, the bets, the pot and
+#the outcome, numbered within a session (one run of the simulator, say).
+#
+#Rows are buffered and inserted BATCH_SIZE at a time with executemany in one
+#transaction, on a database in WAL mode with synchronous=NORMAL, so a
+#commit doesn't wait for a full sync.  The queries below run entirely in
+#SQLite and return only the aggregates.  The ones by category and by
+#session read covering indexes; the one by discards scans the table, as a
+#third index would cost a quarter of the insert rate:
+#
+#    win_rate_by_category()    hands and player win rate per dealt category
+#    average_pot_by_discards() hands and average pot per number of cards drawn
+#    computer_results()        the computer's hands, wins and chips won per
+#                              session and block of hands
+#
+#    python engine.py --hands 1000000 --db hands.db
+#    python handstore.py hands.db
+
+import argparse
+import sqlite3
+import time
+
+import evaluator
+
+BATCH_SIZE = 10000
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS hands (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL REFERENCES sessions (id),
+    hand INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    final_category INTEGER NOT NULL,
+    computer_category INTEGER NOT NULL,
+    discards INTEGER NOT NULL,
+    first_bet INTEGER NOT NULL,
+    second_bet INTEGER NOT NULL,
+    pot INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    money INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hands_by_category
+    ON hands (category, won);
+CREATE INDEX IF NOT EXISTS hands_by_session
+    ON hands (session, hand, won, pot);
+'''
+
+_INSERT = '''
+INSERT INTO hands (session, hand, category, final_category,
+                   computer_category, discards, first_bet, second_bet, pot,
+                   won, money)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+class HandStore(object):
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(_SCHEMA)
+        self.session = None
+        self._hand = 0
+        self._rows = []
+
+    def start_session(self, label=None):
+        #Number the following hands as a new session; returns its id.
+
+        self.flush()
+        with self.db:
+            cursor = self.db.execute(
+                'INSERT INTO sessions (started, label) VALUES (?, ?)',
+                (time.time(), label))
+        self.session = cursor.lastrowid
+        self._hand = 0
+        return self.session
+
+    def write(self, hand):
+        if self.session is None:
+            self.start_session()
+        self._hand += 1
+        category = evaluator.category
+        evaluate5 = evaluator.evaluate5
+        self._rows.append((
+            self.session, self._hand,
+            category(evaluate5(*hand.player_dealt)),
+            category(evaluate5(*hand.player)),
+            category(evaluate5(*hand.computer)),
+            5 - len(set(hand.player_dealt).intersection(hand.player)),
+            hand.bets[0], hand.bets[1], hand.pot, int(hand.won), hand.money))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            with self.db:
+                self.db.executemany(_INSERT, self._rows)
+            del self._rows[:]
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        self.flush()
+        return self.db.execute('SELECT count(*) FROM hands').fetchone()[0]
+
+    def win_rate_by_category(self):
+        #[(category name, hands, player win rate)] by dealt category.
+
+        self.flush()
+        rows = self.db.execute(
+            'SELECT category, count(*), avg(won) FROM hands '
+            'GROUP BY category ORDER BY category')
+        return [(evaluator.CATEGORY_NAMES[c], n, rate) for c, n, rate in rows]
+
+    def average_pot_by_discards(self):
+        #[(cards drawn, hands, average pot)].
+
+        self.flush()
+        return self.db.execute(
+            'SELECT discards, count(*), avg(pot) FROM hands '
+            'GROUP BY discards ORDER BY discards').fetchall()
+
+    def computer_results(self, block=1000):
+        #[(session, first hand of the block, hands, computer wins, chips the
+        #computer won)] per session and block of hands.  The computer
+        #matches every bet, so its stake in a hand is half the pot.
+
+        self.flush()
+        return self.db.execute(
+            'SELECT session, (hand - 1) / ?1 * ?1 + 1, count(*), '
+            'count(*) - sum(won), sum(CASE won WHEN 1 THEN -pot ELSE pot END) / 2 '
+            'FROM hands GROUP BY session, (hand - 1) / ?1 '
+            'ORDER BY session, (hand - 1) / ?1', (block,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query a hand store.')
+    parser.add_argument('path')
+    parser.add_argument('--block', type=int, default=100000,
+                        help='hands per line of the computer results')
+    args = parser.parse_args()
+
+    store = HandStore(args.path)
+    print('%d hands' % len(store))
+    print('\nwin rate by dealt hand:')
+    for name, hands, rate in store.win_rate_by_category():
+        print('  %-16s %9d  %5.1f%%' % (name, hands, rate * 100))
+    print('\naverage pot by cards drawn:')
+    for discards, hands, pot in store.average_pot_by_discards():
+        print('  %d  %9d  %6.1f' % (discards, hands, pot))
+    print('\ncomputer results:')
+    for session, first, hands, wins, chips in store.computer_results(args.block):
+        print('  session %d, hands %d-%d: %d won, %+d chips'
+              % (session, first, first + hands - 1, wins, chips))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
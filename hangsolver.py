@@ -0,0 +1,234 @@
+#Hangman candidate filtering and a letter-frequency solver.
+#
+#For every word length the index holds packed bitsets (one bit per word of
+#that length, in wordlist.py order):
+#
+#    at[p, l]      words with letter l at position p
+#    has[l]        words containing letter l anywhere
+#
+#A Solver starts from all the words of a length and narrows them with
+#bitwise ANDs as guesses come back:
+#
+#    a hit on letter l at positions P    keep at[p, l] for p in P and drop
+#                                        at[p, l] for every other position
+#    a miss on letter l                  drop has[l]
+#
+#and picks its next guess as the unguessed letter found in the most of the
+#remaining candidates.  matches() does the same from a pattern such as
+#'_a__e_' and a list of wrong letters, for the hint in hangman().
+#
+#EvilWord plays the other side for "evil hangman": it never commits to a
+#word.  Each word is also encoded as 26 position masks (bit p of masks[l]
+#set when letter l is at position p), so the word family a guess of l
+#puts a candidate in is just its masks[l].  A guess partitions the
+#remaining candidates with one np.unique over that column and keeps the
+#largest family (ties go to the family revealing the fewest letters).
+#
+#    python hangsolver.py --words 1000      benchmark the solver
+
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+import wordlist
+
+LETTERS = string.ascii_lowercase
+MAX_MISSES = 6
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+def popcount(bits):
+    return int(_POPCOUNT[bits].sum())
+
+
+class Index(object):
+    def __init__(self, words=None):
+        self.words = words or wordlist.default()
+        self._lengths = {}
+
+    def tables(self, length):
+        #(all, at, has) packed bitsets for the words of a length.
+
+        if length not in self._lengths:
+            count = self.words.count(length)
+            letters = np.frombuffer(self.words.bucket(length), dtype=np.uint8)
+            letters = letters.reshape(count, length) - ord('a')
+            onehot = letters[:, :, None] == np.arange(26, dtype=np.uint8)
+            at = np.packbits(onehot.transpose(1, 2, 0), axis=2)
+            has = np.packbits(onehot.any(axis=1).T, axis=1)
+            everything = np.packbits(np.ones(count, dtype=bool))
+            self._lengths[length] = (everything, at, has)
+        return self._lengths[length]
+
+    def position_masks(self, length):
+        #(words, 26) uint16 array: bit p of [w, l] is set when word w has
+        #letter l at position p.
+
+        key = ('masks', length)
+        if key not in self._lengths:
+            count = self.words.count(length)
+            letters = np.frombuffer(self.words.bucket(length), dtype=np.uint8)
+            letters = letters.reshape(count, length) - ord('a')
+            masks = np.zeros((count, 26), dtype=np.uint16)
+            rows = np.arange(count)
+            for p in range(length):
+                masks[rows, letters[:, p]] |= 1 << p
+            self._lengths[key] = masks
+        return self._lengths[key]
+
+    def matches(self, pattern, wrong=()):
+        #Packed bitset of the words fitting pattern ('_' for an unknown
+        #letter) with none of the wrong letters.
+
+        solver = Solver(len(pattern), self)
+        for letter in set(pattern) - set('_'):
+            solver.hit(letter, [i for i, c in enumerate(pattern)
+                                if c == letter])
+        for letter in wrong:
+            solver.miss(letter)
+        return solver.bits
+
+    def candidates(self, bits, length):
+        indices = np.flatnonzero(np.unpackbits(bits,
+                                               count=self.words.count(length)))
+        return [self.words.word(length, int(i)) for i in indices]
+
+
+class Solver(object):
+    def __init__(self, length, index=None):
+        self.length = length
+        self.index = index or default_index()
+        everything, self._at, self._has = self.index.tables(length)
+        self.bits = everything.copy()
+        self.guessed = set()
+
+    def hit(self, letter, positions):
+        l = LETTERS.index(letter)
+        self.guessed.add(letter)
+        for p in range(self.length):
+            if p in positions:
+                self.bits &= self._at[p, l]
+            else:
+                self.bits &= ~self._at[p, l]
+
+    def miss(self, letter):
+        self.guessed.add(letter)
+        self.bits &= ~self._has[LETTERS.index(letter)]
+
+    def count(self):
+        return popcount(self.bits)
+
+    def candidates(self):
+        return self.index.candidates(self.bits, self.length)
+
+    def frequencies(self):
+        #Number of remaining candidates containing each letter.
+
+        return _POPCOUNT[self._has & self.bits].sum(axis=1)
+
+    def next_guess(self):
+        frequencies = self.frequencies()
+        for letter in self.guessed:
+            frequencies[LETTERS.index(letter)] = -1
+        return LETTERS[int(np.argmax(frequencies))]
+
+
+class EvilWord(object):
+    def __init__(self, length, index=None):
+        self.length = length
+        self.index = index or default_index()
+        self._masks = self.index.position_masks(length)
+        self._candidates = np.arange(len(self._masks))
+
+    def guess(self, letter):
+        #Positions of letter in the (still undecided) word, or [] for a
+        #miss.
+
+        l = LETTERS.index(letter)
+        families = self._masks[self._candidates, l]
+        patterns, inverse, counts = np.unique(families, return_inverse=True,
+                                              return_counts=True)
+        revealed = _POPCOUNT[patterns & 0xff] + _POPCOUNT[patterns >> 8]
+        best = np.lexsort((patterns, revealed, -counts))[0]
+        self._candidates = self._candidates[inverse.ravel() == best]
+        return [p for p in range(self.length) if patterns[best] >> p & 1]
+
+    def exclude(self, word):
+        #Dodge a whole word guess: drop word unless it is the last one left.
+
+        if len(self._candidates) > 1:
+            keep = [i for i in self._candidates
+                    if self.index.words.word(self.length, int(i)) != word]
+            if keep:
+                self._candidates = np.array(keep)
+
+    def count(self):
+        return len(self._candidates)
+
+    def word(self):
+        #A word that fits every answer given so far.
+
+        return self.index.words.word(self.length, int(self._candidates[0]))
+
+
+_index = None
+
+
+def default_index():
+    global _index
+    if _index is None:
+        _index = Index()
+    return _index
+
+
+def hint(pattern, wrong=()):
+    #(suggested letter, number of words still possible) for hangman().
+
+    solver = Solver(len(pattern))
+    solver.bits = solver.index.matches(pattern, wrong)
+    solver.guessed.update(set(pattern) - set('_'), wrong)
+    return solver.next_guess(), solver.count()
+
+
+def play(word, index=None):
+    #Let the solver play hangman against word.  Returns the number of
+    #wrong guesses it made (more than MAX_MISSES is a loss).
+
+    solver = Solver(len(word), index)
+    misses = 0
+    found = set()
+    while len(found) < len(set(word)) and misses <= MAX_MISSES:
+        letter = solver.next_guess()
+        positions = [i for i, c in enumerate(word) if c == letter]
+        if positions:
+            solver.hit(letter, positions)
+            found.add(letter)
+        else:
+            solver.miss(letter)
+            misses += 1
+    return misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hangman '
+                                                 'solver on random words.')
+    parser.add_argument('--words', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = default_index()
+    words = [wordlist.random_word(5, 10, rng=rng) for i in range(args.words)]
+    start = time.time()
+    wins = sum(play(word, index) <= MAX_MISSES for word in words)
+    seconds = time.time() - start
+    print('%d/%d won, %.0f games/sec' % (wins, len(words),
+                                         len(words) / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#Hand history files.
+#
+#An append-only file of fixed width records, one per settled hand (an
+#engine.HandResult), after an 8 byte magic:
+#
+#    cards       15 bytes  the 20 card codes, 6 bits each, little endian:
+#                          player as dealt, player at showdown, computer as
+#                          dealt, computer at showdown
+#    bets        2 x u16   the player's first and second round bets
+#    pot         u16
+#    money       u16       the player's stack after the hand
+#    won         u8        1 if the player took the pot
+#
+#24 bytes a hand, so a hundred million hands is 2.4 GB.  HistoryWriter
+#packs records into a buffer and writes it out in bulk.  HistoryFile maps
+#the file: len() and file[i] are O(1), and iterating streams the records
+#chunk by chunk without reading the file into memory.  A record cut short
+#by a crash at the end of the file is ignored.
+#
+#    python history.py hands.bin            summary of a file
+#    python history.py hands.bin --verify   re-evaluate every showdown
+
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import evaluator
+from engine import HandResult
+
+MAGIC = b'HAND\x01\x00\x00\x00'
+RECORD = struct.Struct('<15sHHHHB')
+BUFFER_RECORDS = 8192
+#Records decoded per slice of the map while streaming.
+CHUNK_RECORDS = 65536
+
+_CARDS = 20
+_CARD_BITS = 6
+
+
+def pack(hand):
+    #The record for a HandResult, as bytes.
+
+    cards = 0
+    shift = 0
+    for group in (hand.player_dealt, hand.player, hand.computer_dealt,
+                  hand.computer):
+        for code in group:
+            cards |= code << shift
+            shift += _CARD_BITS
+    return RECORD.pack(cards.to_bytes(15, 'little'), hand.bets[0],
+                       hand.bets[1], hand.pot, hand.money, hand.won)
+
+
+def _unpack(fields):
+    cards, first, second, pot, money, won = fields
+    cards = int.from_bytes(cards, 'little')
+    codes = [(cards >> (_CARD_BITS * i)) & 0x3f for i in range(_CARDS)]
+    return HandResult(tuple(codes[0:5]), tuple(codes[5:10]),
+                      tuple(codes[10:15]), tuple(codes[15:20]),
+                      (first, second), pot, bool(won), money)
+
+
+def unpack(record):
+    #The HandResult of a record.
+
+    return _unpack(RECORD.unpack(record))
+
+
+class HistoryWriter(object):
+    def __init__(self, path, buffer_records=BUFFER_RECORDS):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise ValueError('%s: not a hand history' % path)
+            # drop a partial record left by a crash
+            size = self._file.tell() - len(MAGIC)
+            if size % RECORD.size:
+                self._file.truncate(len(MAGIC) + size - size % RECORD.size)
+                self._file.seek(0, os.SEEK_END)
+        self._buffer = bytearray()
+        self._limit = buffer_records * RECORD.size
+        self.written = 0
+
+    def write(self, hand):
+        self._buffer += pack(hand)
+        self.written += 1
+        if len(self._buffer) >= self._limit:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            del self._buffer[:]
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HistoryFile(object):
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('%s: not a hand history' % path)
+            size = os.fstat(f.fileno()).st_size
+            self._count = (size - len(MAGIC)) // RECORD.size
+            self._map = None
+            if self._count:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self._count
+
+    def record(self, i):
+        #The raw bytes of hand i.
+
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('HistoryFile.record(): index out of range')
+        start = len(MAGIC) + i * RECORD.size
+        return self._map[start:start + RECORD.size]
+
+    def __getitem__(self, i):
+        return unpack(self.record(i))
+
+    def fields(self, start=0, stop=None):
+        #Stream the raw field tuples of hands start to stop.
+        if stop is None or stop > self._count:
+            stop = self._count
+        view = memoryview(self._map) if self._map is not None else None
+        while start < stop:
+            end = min(start + CHUNK_RECORDS, stop)
+            chunk = view[len(MAGIC) + start * RECORD.size:
+                         len(MAGIC) + end * RECORD.size]
+            for fields in RECORD.iter_unpack(chunk):
+                yield fields
+            chunk.release()
+            start = end
+
+    def __iter__(self):
+        return self.hands()
+
+    def hands(self, start=0, stop=None):
+        #Stream the HandResults of hands start to stop.
+
+        for fields in self.fields(start, stop):
+            yield _unpack(fields)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def reevaluate(hands):
+    #For each HandResult, (player strength, computer strength, whether the
+    #recorded outcome agrees with them).
+
+    evaluate5 = evaluator.evaluate5
+    for hand in hands:
+        mine = evaluate5(*hand.player)
+        theirs = evaluate5(*hand.computer)
+        yield mine, theirs, hand.won == (mine > theirs)
+
+
+def summary(hands):
+    #Totals over a stream of HandResults.
+
+    stats = {'hands': 0, 'won': 0, 'pot': 0, 'discards': 0}
+    for hand in hands:
+        stats['hands'] += 1
+        stats['won'] += hand.won
+        stats['pot'] += hand.pot
+        stats['discards'] += len(set(hand.player_dealt) - set(hand.player))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read a hand history file.')
+    parser.add_argument('path')
+    parser.add_argument('--verify', action='store_true',
+                        help='re-evaluate every hand against its outcome')
+    args = parser.parse_args()
+
+    history = HistoryFile(args.path)
+    start = time.time()
+    if args.verify:
+        bad = 0
+        for mine, theirs, agrees in reevaluate(history):
+            bad += not agrees
+        print('%d hands re-evaluated, %d disagree' % (len(history), bad))
+    else:
+        stats = summary(history)
+        n = max(stats['hands'], 1)
+        print('%d hands, %.1f%% won, average pot %.1f, %.2f discards a hand'
+              % (stats['hands'], 100.0 * stats['won'] / n, stats['pot'] / n,
+                 stats['discards'] / n))
+    seconds = time.time() - start
+    print('%.1f s, %.0f hands/sec' % (seconds, len(history) / max(seconds, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#Suit isomorphism.
+#
+#Poker values don't depend on which suit is which: relabelling the suits of
+#a hand (the same relabelling for every card) never changes its strength,
+#its best draw or its equity.  canonical() maps cards to one representative
+#of their class: every suit is described by the 13-bit mask of the ranks it
+#holds, the suits are renamed S, H, D, C in decreasing order of that mask,
+#and the codes come back sorted.  Two sets of cards give the same
+#representative exactly when one is a relabelling of the other; suits with
+#equal masks are interchangeable, so their order doesn't matter.  Several
+#groups of cards (a hand and a board, say) can be canonicalized together,
+#with one relabelling for all of them.
+#
+#colex() ranks a sorted set of codes among the sets of the same size (the
+#combinatorial number system: the sum of C(c_i, i) over its codes in
+#ascending order), with the binomial table BINOM; draw_table.bin and
+#equity.py index hands the same way.  index() numbers a representative: its
+#colex rank plus the number of all smaller sets, so the index of a set of
+#cards never changes and sets of different sizes never collide.
+#
+#IsoCache memoizes a function of a card set on that index, in a bounded
+#LRU, and counts hits and misses.  The function is called with the
+#canonical codes, so it must be suit invariant:
+#
+#    PokerHand.cache = iso.IsoCache(evaluator.evaluate)
+
+import math
+from collections import OrderedDict
+
+CACHE_SIZE = 100000
+
+#BINOM[n][k] for n <= 52, k <= 7, and the first index of each set size.
+_MAX_CARDS = 7
+BINOM = [[math.comb(n, k) for k in range(_MAX_CARDS + 1)] for n in range(53)]
+_OFFSET = [sum(BINOM[52][j] for j in range(k))
+           for k in range(_MAX_CARDS + 1)]
+
+
+def colex(codes):
+    #Colex rank of a set of up to seven sorted card codes among the sets of
+    #the same size.
+
+    return sum(BINOM[c][i] for i, c in enumerate(codes, 1))
+
+
+def canonical(*groups):
+    #The representative of one or more groups of card codes, as a tuple of
+    #sorted codes per group.
+
+    if len(groups) == 1:
+        masks = [0, 0, 0, 0]
+        for code in groups[0]:
+            masks[code // 13] |= 1 << (12 - code % 13)
+        keys = masks
+    else:
+        keys = [[0] * len(groups) for suit in range(4)]
+        for g, group in enumerate(groups):
+            for code in group:
+                keys[code // 13][g] |= 1 << (12 - code % 13)
+    order = sorted(range(4), key=keys.__getitem__, reverse=True)
+    relabel = [0] * 4
+    for new, suit in enumerate(order):
+        relabel[suit] = new * 13
+    return tuple(tuple(sorted(relabel[code // 13] + code % 13
+                              for code in group))
+                 for group in groups)
+
+
+def index(codes):
+    #Stable index of the class of a set of up to seven card codes.
+
+    codes, = canonical(codes)
+    return _index(codes)
+
+
+def _index(codes):
+    if len(codes) > _MAX_CARDS:
+        raise ValueError('index(): at most %d cards' % _MAX_CARDS)
+    return _OFFSET[len(codes)] + colex(codes)
+
+
+class IsoCache(object):
+    def __init__(self, function, size=CACHE_SIZE):
+        self.function = function
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def __call__(self, codes):
+        codes, = canonical(codes)
+        key = _index(codes)
+        values = self._values
+        if key in values:
+            self.hits += 1
+            values.move_to_end(key)
+            return values[key]
+        self.misses += 1
+        value = values[key] = self.function(list(codes))
+        if len(values) > self.size:
+            values.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        self._values.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._values)}
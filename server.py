@@ -0,0 +1,321 @@
+#Many five card draw tables in one process.
+#
+#An asyncio server hosting GameState tables (see engine.py) for clients on a
+#TCP port or a Unix socket.  The computer side of every table is played by
+#the server with the precomputed optimal draw.  The protocol is one JSON
+#object per line each way; every request gets exactly one reply, in order,
+#echoing the request's "id" if it has one:
+#
+#    {"op": "new"}                          open a table on this connection
+#    {"op": "step", "table": 3, "action": "bet", "arg": 10}
+#    {"op": "close", "table": 3}
+#    {"op": "stats"}                        server wide counters
+#
+#    {"ok": true, "table": 3, "events": [["ante", 5]], "state": {...}}
+#    {"ok": false, "error": "..."}
+#
+#"state" holds the phase, both stacks, the pot, the player's cards (e.g.
+#"10H") and the legal actions; once the hand reaches the showdown it also
+#shows the computer's cards.  A connection's tables are dropped when it
+#closes.
+#
+#    python server.py serve --port 7777
+#    python server.py load --spawn --tables 200 --hands 20
+#
+#load plays --tables tables at once, one connection each, against a server
+#(started in a child process with --spawn) and reports the p50 and p99
+#latency of an action as the client sees it.  It also asks the server for
+#the CPU time it used, which gives the number of tables at the played pace
+#that one fully busy core could host (tables * wall time / server CPU).
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from drawtable import optimal_draw
+from engine import (GameState, BET, CHECK, DRAW, CONTINUE, FIRST_BET,
+                    SECOND_BET, DISCARD, SHOWDOWN, OVER)
+
+HOST = '127.0.0.1'
+PORT = 7777
+#Longest request line accepted, and how many connections may wait to be
+#accepted (a load run opens hundreds at once).
+LINE_LIMIT = 64 * 1024
+BACKLOG = 1024
+
+
+def table_state(game):
+    state = {
+        'phase': game.phase,
+        'money': game.money,
+        'cmoney': game.cmoney,
+        'pot': game.pot,
+        'cards': [str(card) for card in game.player],
+        'actions': game.legal_actions(),
+    }
+    if game.phase == SHOWDOWN:
+        state['computer'] = [str(card) for card in game.computer]
+    return state
+
+
+class PokerServer(object):
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.tables = {}
+        self.next_table = 1
+        self.connections = 0
+        self.requests = 0
+
+    def _new_table(self, owned):
+        number = self.next_table
+        self.next_table += 1
+        if self.seed is None:
+            rng = random.Random()
+        else:
+            rng = random.Random(self.seed * 2 ** 32 + number)
+        game = GameState(computer_draw=optimal_draw, rng=rng)
+        self.tables[number] = game
+        owned.add(number)
+        return number, game, game.step(CONTINUE)
+
+    def dispatch(self, request, owned):
+        #The reply to one request from a connection owning the tables in
+        #owned.
+        op = request.get('op')
+        if op == 'new':
+            number, game, events = self._new_table(owned)
+            return {'ok': True, 'table': number, 'events': events,
+                    'state': table_state(game)}
+        if op == 'stats':
+            times = os.times()
+            return {'ok': True, 'tables': len(self.tables),
+                    'connections': self.connections,
+                    'requests': self.requests,
+                    'cpu': times.user + times.system}
+        if op not in ('step', 'close'):
+            raise ValueError('unknown op %r' % op)
+        number = request.get('table')
+        if number not in owned:
+            raise ValueError('no table %r on this connection' % number)
+        if op == 'close':
+            owned.discard(number)
+            del self.tables[number]
+            return {'ok': True, 'table': number}
+        game = self.tables[number]
+        events = game.step(request.get('action'), request.get('arg'))
+        return {'ok': True, 'table': number, 'events': events,
+                'state': table_state(game)}
+
+    async def handle(self, reader, writer):
+        owned = set()
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                self.requests += 1
+                request = {}
+                try:
+                    parsed = json.loads(line)
+                    if not isinstance(parsed, dict):
+                        raise ValueError('expected a JSON object')
+                    request = parsed
+                    reply = self.dispatch(request, owned)
+                except (ValueError, TypeError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    # a bug in one request must not take the connection
+                    # (and its other tables) down with it
+                    reply = {'ok': False,
+                             'error': '%s: %s' % (type(e).__name__, e)}
+                if 'id' in request:
+                    reply['id'] = request['id']
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            for number in owned:
+                del self.tables[number]
+            writer.close()
+
+    async def start(self, host=HOST, port=PORT, path=None):
+        if path is not None:
+            return await asyncio.start_unix_server(
+                self.handle, path, limit=LINE_LIMIT, backlog=BACKLOG)
+        return await asyncio.start_server(
+            self.handle, host, port, limit=LINE_LIMIT, backlog=BACKLOG)
+
+
+async def serve(host=HOST, port=PORT, path=None, seed=None):
+    server = await PokerServer(seed).start(host, port, path)
+    async with server:
+        await server.serve_forever()
+
+
+#The load generator.
+
+class _Client(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def call(self, request):
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        if not reply['ok']:
+            raise ValueError(reply['error'])
+        return reply
+
+    def close(self):
+        self.writer.close()
+
+
+async def _connect(host, port, path):
+    if path is not None:
+        return _Client(*await asyncio.open_unix_connection(path))
+    return _Client(*await asyncio.open_connection(host, port))
+
+
+def _choose(state, rng):
+    #A random but legal move for the player.
+    phase = state['phase']
+    if phase in (FIRST_BET, SECOND_BET):
+        if BET in state['actions'] and rng.random() < 0.3:
+            return {'action': BET, 'arg': min(10, state['money'],
+                                              state['cmoney'])}
+        return {'action': CHECK}
+    if phase == DISCARD:
+        return {'action': DRAW,
+                'arg': [i for i in range(5) if rng.random() < 0.4]}
+    return {'action': CONTINUE}
+
+
+async def _play_table(connect, hands, think, rng, latencies):
+    client = await connect()
+    try:
+        played = 0
+        reply = await client.call({'op': 'new'})
+        while True:
+            state = reply['state']
+            if state['phase'] == OVER:
+                await client.call({'op': 'close', 'table': reply['table']})
+                reply = await client.call({'op': 'new'})
+                continue
+            if state['phase'] == FIRST_BET:
+                played += 1
+                if played > hands:
+                    break
+            if think:
+                await asyncio.sleep(think * rng.random() * 2)
+            request = dict(_choose(state, rng), op='step',
+                           table=reply['table'])
+            start = time.perf_counter()
+            reply = await client.call(request)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def load(tables=100, hands=10, think=0.0, host=HOST, port=PORT,
+               path=None, seed=0, wait=0.0):
+    #Play hands hands at each of tables tables at once; think is the mean
+    #pause before each action, in seconds.  Keeps trying to reach the
+    #server for wait seconds.  Returns a dict of results.
+
+    def connect():
+        return _connect(host, port, path)
+
+    deadline = time.time() + wait
+    while True:
+        try:
+            monitor = await connect()
+            break
+        except OSError:
+            if time.time() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+    before = (await monitor.call({'op': 'stats'}))['cpu']
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _play_table(connect, hands, think, random.Random(seed * 2 ** 32 + i),
+                    latencies)
+        for i in range(tables)])
+    wall = time.perf_counter() - start
+    cpu = (await monitor.call({'op': 'stats'}))['cpu'] - before
+    monitor.close()
+    return {
+        'tables': tables,
+        'actions': len(latencies),
+        'seconds': wall,
+        'actions_per_sec': len(latencies) / wall,
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'server_cpu': cpu,
+        'tables_per_core': tables * wall / cpu if cpu else float('inf'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-table five card draw server.')
+    parser.add_argument('mode', choices=['serve', 'load'])
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--unix', help='Unix socket path instead of TCP')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--hands', type=int, default=10,
+                        help='hands to play at each table')
+    parser.add_argument('--think', type=float, default=0.0,
+                        help='mean seconds before each action')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start a server in a child process for load')
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, args.seed))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    child = None
+    if args.spawn:
+        command = [sys.executable, os.path.abspath(__file__), 'serve',
+                   '--host', args.host, '--port', str(args.port)]
+        if args.unix:
+            command += ['--unix', args.unix]
+        child = subprocess.Popen(command)
+    try:
+        result = asyncio.run(load(args.tables, args.hands, args.think,
+                                  args.host, args.port, args.unix,
+                                  args.seed or 0, 10.0 if child else 0.0))
+    finally:
+        if child is not None:
+            child.terminate()
+            child.wait()
+    print('%(tables)d tables, %(actions)d actions in %(seconds).1f s '
+          '(%(actions_per_sec).0f/s); p50 %(p50_ms).2f ms, '
+          'p99 %(p99_ms).2f ms; server CPU %(server_cpu).2f s, '
+          '%(tables_per_core).0f tables per core' % result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#evaluate_batch() against evaluator.evaluate() on seeded random hands.
+#
+#    python -m pytest test_batch.py
+
+import unittest
+
+import evaluator
+
+try:
+    import numpy as np
+    import batch
+except ImportError:
+    np = None
+
+SEED = 5
+HANDS = 20000
+
+
+@unittest.skipIf(np is None, 'needs NumPy')
+class BatchTest(unittest.TestCase):
+    def test_matches_evaluate(self):
+        rng = np.random.default_rng(SEED)
+        for n in (5, 6, 7):
+            hands = batch.shuffled_decks(HANDS, rng)[:, :n]
+            strengths, categories = batch.evaluate_batch(hands)
+            expected = [evaluator.evaluate(hand) for hand in hands.tolist()]
+            self.assertEqual(strengths.tolist(), expected)
+            self.assertEqual(categories.tolist(),
+                             [evaluator.category(s) for s in expected])
+
+    def test_rejects_bad_shapes(self):
+        for shape in ((10,), (10, 4), (10, 8)):
+            with self.assertRaises(ValueError):
+                batch.evaluate_batch(np.zeros(shape, dtype=np.uint8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#Deck bookkeeping under random deals, discards and returns.
+#
+#    python -m pytest test_cards.py
+
+import random
+import unittest
+
+from cards import CARDS, Deck, POS_BOTTOM, POS_TOP
+
+
+class DeckTest(unittest.TestCase):
+    def check(self, deck, popped, discarded):
+        #The ring holds every card once, _pos agrees with it and the cards
+        #are where the deck says they are.
+        self.assertEqual(sorted(card.code for card in deck._slots),
+                         list(range(52)))
+        for i, card in enumerate(deck._slots):
+            self.assertEqual(deck._pos[card.code], i)
+        self.assertEqual(set(deck.popped), popped)
+        self.assertEqual(set(deck.discarded), discarded)
+        self.assertEqual(set(deck.active),
+                         set(CARDS) - popped - discarded)
+        self.assertEqual(deck.stats(),
+                         (52 - len(popped) - len(discarded), len(popped),
+                          len(discarded)))
+
+    def test_random_deal_discard_return(self):
+        rng = random.Random(9)
+        for game in range(200):
+            deck = Deck()
+            deck.shuffle(rng)
+            popped = set()
+            discarded = set()
+            for step in range(60):
+                action = rng.random()
+                if action < 0.4 and len(deck):
+                    popped.add(deck.pop())
+                elif action < 0.55 and len(deck):
+                    top = deck.active[-1]
+                    deck.discard()
+                    discarded.add(top)
+                elif action < 0.65 and len(deck):
+                    card = rng.choice(deck.active)
+                    deck.remove([card])
+                    popped.add(card)
+                elif popped or discarded:
+                    out = sorted(popped | discarded, key=lambda c: c.code)
+                    back = rng.sample(out, rng.randint(1, len(out)))
+                    pos = rng.choice((POS_BOTTOM, POS_TOP))
+                    deck.return_cards(back, pos)
+                    popped.difference_update(back)
+                    discarded.difference_update(back)
+                    # each returned card went to the chosen end in turn
+                    if pos == POS_TOP:
+                        self.assertEqual(deck.active[-len(back):], back)
+                    else:
+                        self.assertEqual(deck.active[:len(back)],
+                                         back[::-1])
+                self.check(deck, popped, discarded)
+            if rng.random() < 0.5:
+                deck.shuffle(rng)
+                self.check(deck, popped, discarded)
+            deck.return_all()
+            self.check(deck, set(), set())
+
+    def test_return_to_top_is_dealt_next(self):
+        deck = Deck()
+        deck.shuffle(random.Random(3))
+        hand = [deck.pop() for i in range(5)]
+        deck.return_cards(hand, POS_TOP)
+        self.assertEqual([deck.pop() for i in range(5)], hand[::-1])
+
+    def test_empty_deck(self):
+        deck = Deck()
+        popped = set(deck.pop() for i in range(52))
+        with self.assertRaises(IndexError):
+            deck.pop()
+        with self.assertRaises(IndexError):
+            deck.discard()
+        self.check(deck, popped, set())
+        deck.return_all()
+        self.check(deck, set(), set())
+
+    def test_return_rejects_cards_in_the_deck(self):
+        deck = Deck()
+        card = deck.pop()
+        with self.assertRaises(Exception):
+            deck.return_cards([deck.active[0]])
+        deck.return_cards([card])
+        with self.assertRaises(Exception):
+            deck.return_cards([card])
+        self.check(deck, set(), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
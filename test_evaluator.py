@@ -0,0 +1,190 @@
+#PokerHand against the card-by-card evaluator it replaced, on every five
+#card hand, and the best-of-six and seven path against the best of the five
+#card subsets.  Takes a minute or so:
+#
+#    python -m pytest test_evaluator.py
+
+import random
+import unittest
+from collections import OrderedDict
+from itertools import combinations
+
+import evaluator
+from cards import ranks, CARDS, PokerHand
+
+SEED = 11
+BEST_OF_HANDS = 20000
+
+
+class ReferenceHand(object):
+    #The original PokerHand evaluation, kept verbatim apart from logging:
+    #sets hand_rank, hand_cards and kickers.
+
+    def __init__(self, cards):
+        cards.sort(reverse=True)
+        self.cards = cards
+        self._eval_hand_rank()
+        self._fill_kickers()
+
+    def _by_rank(self, cards=None):
+        if cards is None:
+            cards = self.cards
+        ranked = OrderedDict()
+        for card in cards:
+            if card.rank in ranked:
+                ranked[card.rank].append(card)
+            else:
+                ranked[card.rank] = [card]
+        return ranked
+
+    def _by_suit(self, cards=None):
+        if cards is None:
+            cards = self.cards
+        suited = OrderedDict()
+        for card in cards:
+            if card.suit in suited:
+                suited[card.suit].append(card)
+            else:
+                suited[card.suit] = [card]
+        return suited
+
+    def _find_flushes(self, cards=None):
+        if cards is None:
+            cards = self.cards
+        flushes = []
+        for cards in self._by_suit(cards).values():
+            l = len(cards)
+            if l >= 5:
+                for i in range(0, l - 4):
+                    flushes.append(cards[i:i + 5])
+        return flushes
+
+    def _find_straights(self, cards=None):
+        if cards is None:
+            cards = self.cards
+        straights = []
+        for i in range(0, len(cards) - 4):
+            card_ranks = [c.rank for c in cards[i:i + 5]]
+            j = ranks.index(card_ranks[0])
+            if card_ranks == ranks[j:j + 5]:
+                straights.append(cards[i:i + 5])
+        return straights
+
+    def _fill_kickers(self):
+        hand_count = len(self.hand_cards)
+        kicker_count = 5 - hand_count
+        if kicker_count > 0:
+            kickers = self.cards[:]
+            for card in self.hand_cards:
+                kickers.remove(card)
+            self.kickers = kickers[:kicker_count]
+        else:
+            self.kickers = []
+
+    def _eval_hand_rank(self):
+        straights = self._find_straights()
+        flushes = self._find_flushes()
+        pairs = []
+        threes = []
+        fours = []
+        for cards in self._by_rank().values():
+            l = len(cards)
+            if l >= 4:
+                fours.append(cards[0:4])
+            elif l == 3:
+                threes.append(cards)
+            elif l == 2:
+                pairs.append(cards)
+        for cards in straights:
+            if cards in flushes:
+                self.hand_rank = 8
+                self.hand_cards = cards
+                return
+        if len(fours) > 0:
+            self.hand_rank = 7
+            self.hand_cards = fours[0]
+            return
+        if len(threes) > 1:
+            self.hand_rank = 6
+            self.hand_cards = threes[0] + threes[1][:2]
+            return
+        elif len(threes) == 1 and len(pairs) > 0:
+            self.hand_rank = 6
+            self.hand_cards = threes[0] + pairs[0]
+            return
+        if len(flushes) > 0:
+            self.hand_rank = 5
+            self.hand_cards = flushes[0]
+            return
+        if len(straights) > 0:
+            self.hand_rank = 4
+            self.hand_cards = straights[0]
+            return
+        if len(threes) > 0:
+            self.hand_rank = 3
+            self.hand_cards = threes[0]
+            return
+        if len(pairs) > 1:
+            self.hand_rank = 2
+            self.hand_cards = pairs[0] + pairs[1]
+            return
+        if len(pairs) == 1:
+            self.hand_rank = 1
+            self.hand_cards = pairs[0]
+            return
+        self.hand_rank = 0
+        self.hand_cards = [self.cards[0]]
+
+    def key(self):
+        #What the original __cmp__ compared: the category, then the hand
+        #cards, then the kickers, card by card on rank.
+        return (self.hand_rank, [c.value for c in self.hand_cards],
+                [c.value for c in self.kickers])
+
+
+class EvaluatorTest(unittest.TestCase):
+    def test_every_five_card_hand(self):
+        strengths = {}
+        hands = 0
+        for combo in combinations(CARDS, 5):
+            old = ReferenceHand(list(combo))
+            new = PokerHand(list(combo))
+            self.assertEqual(new.hand_rank, old.hand_rank, combo)
+            self.assertEqual(new.hand_cards, old.hand_cards, combo)
+            self.assertEqual(new.kickers, old.kickers, combo)
+            key = old.key()
+            self.assertEqual(strengths.setdefault(repr(key), (key, new.strength)),
+                             (key, new.strength), combo)
+            hands += 1
+        self.assertEqual(hands, 2598960)
+        self.assertEqual(len(strengths), evaluator.HAND_COUNT)
+        # equal keys share a strength (checked above) and the strengths
+        # follow the order of the keys
+        ordered = sorted(strengths.values())
+        self.assertEqual([s for k, s in ordered],
+                         list(range(1, evaluator.HAND_COUNT + 1)))
+
+    def test_best_five_of_six_and_seven(self):
+        rng = random.Random(SEED)
+        evaluate5 = evaluator.evaluate5
+        for n in (6, 7):
+            for i in range(BEST_OF_HANDS):
+                hand = rng.sample(CARDS, n)
+                codes = [card.code for card in hand]
+                strength, best = max(
+                    (evaluate5(*(c.code for c in five)), five)
+                    for five in combinations(sorted(hand), 5))
+                self.assertEqual(evaluator.evaluate(codes), strength, hand)
+                # subsets tying for the best differ only in suits
+                new = PokerHand(hand[:])
+                old = ReferenceHand(list(best))
+                self.assertEqual(new.strength, strength, hand)
+                self.assertEqual(new.hand_rank, old.hand_rank, hand)
+                self.assertEqual([c.rank for c in new.hand_cards],
+                                 [c.rank for c in old.hand_cards], hand)
+                self.assertEqual([c.rank for c in new.kickers],
+                                 [c.rank for c in old.kickers], hand)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,17 @@
+#Import time budgets (bench.IMPORT_BUDGET_MS) and no tkinter in the
+#headless modules.  Each module is imported in a fresh interpreter:
+#
+#    python -m pytest test_imports.py
+
+import unittest
+
+import bench
+
+
+class ImportTest(unittest.TestCase):
+    def test_budgets(self):
+        self.assertEqual(bench.check_imports(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#The hangman dictionary, compiled for quick random access.
+#
+#dic.txt is compiled once into dic.idx, a binary file the game memory maps
+#instead of reading 267,749 lines on every start:
+#
+#    header   magic, version, size and mtime of the dic.txt it was built
+#             from, longest word length
+#    table    for each length n = 0 .. longest: offset of the bucket,
+#             number of words, how many of them have no repeated letter
+#    buckets  the words of each length, lowercase, packed back to back with
+#             no separators (every word in a bucket is n bytes), the words
+#             without repeated letters first
+#
+#Word i of length n is then a slice at offset + i * n, so picking a random
+#word of a length range, with or without repeated letters, costs O(1) and
+#touches a single page.  A restriction to a set of letters is rejection
+#sampled from there (expected O(1) unless the letters are very restrictive)
+#and falls back to scanning the buckets in the range.
+#
+#dic.idx is rebuilt automatically whenever dic.txt's size or modification
+#time no longer match the header.
+
+import mmap
+import os
+import random
+import struct
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DIC_PATH = os.path.join(HERE, 'dic.txt')
+MAGIC = b'HDIC'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sIQQI')
+_ENTRY = struct.Struct('<QII')
+
+MAX_TRIES = 1000
+
+
+def index_path(source):
+    return os.path.splitext(source)[0] + '.idx'
+
+
+def source_stamp(source):
+    st = os.stat(source)
+    return st.st_size, st.st_mtime_ns
+
+
+def compile_words(source, stamp=None):
+    #The compiled form of a word list file, as bytes.
+
+    if stamp is None:
+        stamp = source_stamp(source)
+    buckets = {}
+    with open(source, 'rb') as f:
+        for line in f:
+            word = line.strip().lower()
+            if word:
+                buckets.setdefault(len(word), []).append(word)
+    longest = max(buckets) if buckets else 0
+
+    data_start = _HEADER.size + _ENTRY.size * (longest + 1)
+    table = []
+    data = []
+    offset = data_start
+    for n in range(longest + 1):
+        words = sorted(buckets.get(n, []))
+        distinct = [w for w in words if len(set(w)) == n]
+        repeats = [w for w in words if len(set(w)) != n]
+        table.append(_ENTRY.pack(offset, len(words), len(distinct)))
+        data.extend(distinct)
+        data.extend(repeats)
+        offset += n * len(words)
+
+    return b''.join([_HEADER.pack(MAGIC, VERSION, stamp[0], stamp[1], longest)]
+                    + table + data)
+
+
+class WordList(object):
+    def __init__(self, source=DIC_PATH):
+        self.source = source
+        self._data = self._open()
+        magic, version, size, mtime, self.longest = \
+            _HEADER.unpack_from(self._data, 0)
+        self._table = [_ENTRY.unpack_from(self._data,
+                                          _HEADER.size + _ENTRY.size * n)
+                       for n in range(self.longest + 1)]
+
+    def _open(self):
+        stamp = source_stamp(self.source)
+        path = index_path(self.source)
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size, mtime, longest = _HEADER.unpack_from(data, 0)
+            if (magic, version, size, mtime) == (MAGIC, VERSION) + stamp:
+                return data
+            data.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+        compiled = compile_words(self.source, stamp)
+        try:
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(compiled)
+            os.replace(tmp, path)
+        except OSError:
+            # read-only checkout: just use the compiled copy in memory
+            return compiled
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def count(self, length, no_repeats=False):
+        if not 0 <= length <= self.longest:
+            return 0
+        offset, count, distinct = self._table[length]
+        return distinct if no_repeats else count
+
+    def word(self, length, i):
+        #The i-th word of the given length.
+
+        offset, count, distinct = self._table[length]
+        if not 0 <= i < count:
+            raise IndexError('WordList.word(): index out of range')
+        start = offset + i * length
+        return self._data[start:start + length].decode('ascii')
+
+    def bucket(self, length):
+        #All the words of a length as one buffer, n bytes per word.
+
+        offset, count, distinct = self._table[length]
+        return memoryview(self._data)[offset:offset + count * length]
+
+    def words(self, length, no_repeats=False):
+        for i in range(self.count(length, no_repeats)):
+            yield self.word(length, i)
+
+    def __len__(self):
+        return sum(count for offset, count, distinct in self._table)
+
+    def _pick(self, lengths, no_repeats, rng):
+        counts = [self.count(n, no_repeats) for n in lengths]
+        i = int(rng.random() * sum(counts))
+        for n, count in zip(lengths, counts):
+            if i < count:
+                return self.word(n, i)
+            i -= count
+
+    def random_word(self, min_len=5, max_len=10, letters=None,
+                    no_repeats=False, rng=random):
+        #A random word of min_len to max_len letters.  letters restricts
+        #the word to those letters; no_repeats to words without a repeated
+        #letter.  Raises ValueError when no word fits.
+
+        lengths = range(max(min_len, 0), min(max_len, self.longest) + 1)
+        if not sum(self.count(n, no_repeats) for n in lengths):
+            raise ValueError('WordList.random_word(): no words of that length')
+        if letters is None:
+            return self._pick(lengths, no_repeats, rng)
+
+        letters = set(letters.lower())
+        for i in range(MAX_TRIES):
+            word = self._pick(lengths, no_repeats, rng)
+            if letters.issuperset(word):
+                return word
+        matches = [w for n in lengths for w in self.words(n, no_repeats)
+                   if letters.issuperset(w)]
+        if not matches:
+            raise ValueError('WordList.random_word(): no word fits')
+        return rng.choice(matches)
+
+
+_default = None
+
+
+def default():
+    #The WordList for dic.txt, opened on first use.
+
+    global _default
+    if _default is None:
+        _default = WordList()
+    return _default
+
+
+def random_word(min_len=5, max_len=10, letters=None, no_repeats=False,
+                rng=random):
+    return default().random_word(min_len, max_len, letters, no_repeats, rng)